@@ -3,13 +3,25 @@ API Routes for Asha Chatbot
 Handles all API endpoints for live conversation
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, g, request, jsonify, make_response, stream_with_context
+import functools
 import os
 import requests
 import logging
+import time
 import uuid
 import sys
 import json
+from src.admission import Rejected, get_admission
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitOpen, get_upstream_breaker
+from src.completion_cache import conversation_key, get_completion_cache
+from src.fallback_module import FallbackModule
+from src.history_packer import get_history_packer
+from src.metrics import REGISTRY, Counter, span, timed
+from src.session_store import make_session_store
+from src.single_flight import FLIGHTS, SingleFlight
+from src.startup import PROFILE, memory_usage, rag_warmup, rag_warmup_enabled
+from src.upstream import get_async_client, get_client, upstream_unavailable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -18,8 +30,278 @@ logger = logging.getLogger(__name__)
 # Create Blueprint for API routes
 api = Blueprint('api', __name__)
 
-# Dictionary to store active conversations
-active_conversations = {}
+# Conversation history per session: bounded and expiring, and shared across gunicorn
+# workers when ASHA_SESSION_STORE=sqlite (see src/session_store.py)
+active_conversations = make_session_store(namespace="live_chat")
+
+# Identical concurrent chat turns share one upstream call
+chat_flight = SingleFlight("live_chat")
+
+# The upstream base URL comes from ASHA_LLM_BASE_URL (see src/upstream.py); point it
+# at a local stub server for tests
+UPSTREAM_MODEL = os.environ.get('ASHA_LLM_MODEL', 'llama3-70b-8192')
+
+# Seconds a chat turn may take, from arrival (including the admission queue) to
+# the upstream answer; turns that cannot make it are answered locally
+CHAT_DEADLINE = float(os.environ.get('ASHA_CHAT_DEADLINE', '8'))
+
+# Templates and formatting for answers built from local retrieval
+fallback = FallbackModule()
+
+CHAT_RESPONSES = Counter("asha_chat_responses_total", "Live chat responses by route and HTTP status",
+                         ("route", "status"))
+LOCAL_ANSWERS = Counter("asha_local_answers_total", "Chat turns answered locally in place of the upstream",
+                        ("reason",))
+UPSTREAM_TOKENS = Counter("asha_upstream_tokens_total", "Tokens billed by the upstream LLM", ("kind",))
+
+
+@REGISTRY.collector
+def component_metrics():
+    """Counters the caches, circuit breaker, admission control and request coalescing keep anyway, read at scrape time"""
+    cache = get_completion_cache()
+    if cache:
+        stats = cache.stats()
+        yield "asha_completion_cache_lookups_total", "counter", "Completion cache lookups by result", [
+            ({"result": "exact_hit"}, stats["exact_hits"]),
+            ({"result": "semantic_hit"}, stats["semantic_hits"]),
+            ({"result": "miss"}, stats["misses"]),
+        ]
+        yield ("asha_completion_cache_tokens_saved_total", "counter",
+               "Upstream tokens not spent thanks to the completion cache", [({}, stats["tokens_saved"])])
+    warmup = rag_warmup()
+    if warmup.ready:
+        stats = warmup.get().cache_stats()
+        yield "asha_query_embedding_cache_lookups_total", "counter", "Query embedding cache lookups by result", [
+            ({"result": "hit"}, stats["hits"]),
+            ({"result": "miss"}, stats["misses"]),
+        ]
+
+    breaker = get_upstream_breaker().stats()
+    yield "asha_upstream_breaker_state", "gauge", "Upstream circuit breaker state (1 for the current state)", [
+        ({"state": state}, int(breaker["state"] == state)) for state in (CLOSED, OPEN, HALF_OPEN)
+    ]
+    yield "asha_upstream_breaker_refused_total", "counter", "Upstream calls refused by the circuit breaker", [
+        ({"reason": "open"}, breaker["refused"] - breaker["refused_deadline"]),
+        ({"reason": "deadline"}, breaker["refused_deadline"]),
+    ]
+
+    admission = get_admission().stats()
+    limiters = [("threads", admission["concurrency"]), ("async", admission["async_concurrency"])]
+    yield "asha_chats_active", "gauge", "Chats holding a concurrency slot", [
+        ({"limiter": name}, stats["active"]) for name, stats in limiters
+    ]
+    yield "asha_chats_queued", "gauge", "Chats waiting for a concurrency slot", [
+        ({"limiter": name}, stats["queued"]) for name, stats in limiters
+    ]
+    rates = admission["rate_limits"]
+    yield "asha_admission_rejected_total", "counter", "Chat requests shed by admission control", [
+        ({"reason": "api_key_rate"}, rates["api_key"]["rejected"]),
+        ({"reason": "session_rate"}, rates["session"]["rejected"]),
+        ({"reason": "queue_full"}, sum(stats["rejected_queue_full"] for _, stats in limiters)),
+        ({"reason": "queue_timeout"}, sum(stats["rejected_timeout"] for _, stats in limiters)),
+    ]
+
+    flights = [(name, flight.stats()) for name, flight in list(FLIGHTS.items())]
+    yield "asha_coalesced_calls_total", "counter", "Calls served by an identical call already in flight", [
+        ({"flight": name}, stats["coalesced"]) for name, stats in flights
+    ]
+
+# System prompt that defines the assistant's behavior
+SYSTEM_PROMPT = """
+        You are Asha, an AI career assistant designed to help women explore career opportunities,
+        job listings, professional development events, and mentorship programs. 
+        You provide supportive, encouraging, and bias-free guidance.
+        Keep responses concise and focused on empowering women in their careers.
+        """
+
+
+@timed("history_assembly")
+def build_messages(history):
+    """
+    System prompt followed by as much recent history as fits the token budget;
+    older turns are summarized into the system message (see src/history_packer.py)
+    """
+    return get_history_packer().pack(SYSTEM_PROMPT, history)
+
+
+def start_conversation_turn(data):
+    """
+    Validate a chat request and record the user message.
+
+    Returns (session_id, api_key, history, None) or (None, None, None, (error_body, status)),
+    where history includes the new message. The error is a plain dict so the ASGI
+    routes (app/async_routes.py) can share this function.
+    """
+    user_message = data.get('message', '')
+    session_id = data.get('session_id', None)
+    provider = data.get('provider', 'groq')
+    api_key = data.get('api_key', '')
+
+    if not user_message:
+        return None, None, None, ({"error": "No message provided"}, 400)
+    if not api_key:
+        return None, None, None, ({"error": "No API key provided. Please set your Groq API key in the settings."}, 400)
+    if provider not in ('groq', 'xai'):
+        return None, None, None, ({
+            "error": f"Unsupported provider: {provider}. Only Groq/LLaMA models are supported."
+        }, 400)
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+    history = active_conversations.append(session_id, {"role": "user", "content": user_message})
+    return session_id, api_key, history, None
+
+
+def rejection_response(e):
+    """(body, 429, headers) for a request shed by admission control"""
+    return {"error": e.message, "reason": e.reason, "retry_after": e.retry_after}, 429, {"Retry-After": str(e.retry_after)}
+
+
+def admission_controlled(view):
+    """
+    Rate-limit the request by API key and session and hold a concurrency slot
+    while it runs (until the body is sent, for streamed responses). Requests that
+    cannot be admitted get 429 with Retry-After. Admission happens before the user
+    message is recorded, so a rejected message does not enter the history. The
+    turn's deadline (g.chat_deadline) starts before waiting for admission.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.chat_deadline = time.monotonic() + CHAT_DEADLINE
+        data = request.get_json(silent=True) or {}
+        try:
+            ticket = get_admission().admit(data.get('api_key', ''), data.get('session_id'))
+        except Rejected as e:
+            logger.warning(f"Shed {request.path} request: {e.reason}")
+            CHAT_RESPONSES.labels(request.path, "429").inc()
+            return rejection_response(e)
+        try:
+            with span(view.__name__):
+                response = make_response(view(*args, **kwargs))
+        except BaseException:
+            ticket.release()
+            raise
+        CHAT_RESPONSES.labels(request.path, str(response.status_code)).inc()
+        if response.is_streamed:
+            response.call_on_close(ticket.release)
+        else:
+            ticket.release()
+        return response
+    return wrapper
+
+
+@timed("completion_cache_lookup")
+def cached_completion(messages):
+    """Completion cached for this conversation (exact or paraphrased), or None"""
+    cache = get_completion_cache()
+    return cache.lookup('groq', UPSTREAM_MODEL, messages) if cache else None
+
+
+def remember_completion(messages, bot_message, tokens=0):
+    cache = get_completion_cache()
+    if cache:
+        cache.store('groq', UPSTREAM_MODEL, messages, bot_message, tokens)
+
+
+def chat_payload(messages, stream=False):
+    """Request body for the upstream chat completions endpoint"""
+    payload = {
+        'messages': messages,
+        'model': UPSTREAM_MODEL,
+        'temperature': 0.7,
+        'max_tokens': 800
+    }
+    if stream:
+        payload['stream'] = True
+    return payload
+
+
+def completion_result(messages, result):
+    """Answer text of an upstream completion, also stored in the completion cache"""
+    if not (result and 'choices' in result and len(result['choices']) > 0):
+        raise ValueError("Invalid response format from API")
+    bot_message = result['choices'][0]['message']['content']
+    usage = result.get('usage') or {}
+    UPSTREAM_TOKENS.labels("prompt").inc(usage.get('prompt_tokens', 0))
+    UPSTREAM_TOKENS.labels("completion").inc(usage.get('completion_tokens', 0))
+    remember_completion(messages, bot_message, usage.get('total_tokens', 0))
+    return bot_message
+
+
+def complete_upstream(api_key, messages, deadline=None):
+    """Non-streaming completion for messages"""
+    # Pooled keep-alive connection per API key, with retries on 429/5xx, behind the circuit breaker
+    with span("upstream_llm"):
+        response = get_client().chat_completion(api_key, chat_payload(messages), deadline=deadline)
+    
+    # Check response status
+    response.raise_for_status()
+    return completion_result(messages, response.json())
+
+
+def local_answer(query):
+    """
+    Answer from local retrieval and templates (see FallbackModule.local_response),
+    used when the upstream is unavailable or too slow. Never waits for the RAG
+    warm-up: until it is ready the answer comes from templates alone.
+    """
+    warmup = rag_warmup()
+    retrieved = None
+    if warmup.ready:
+        try:
+            retrieved = warmup.get().retrieve_information(query)
+        except Exception as e:
+            logger.warning(f"Local retrieval failed: {str(e)}")
+    return fallback.local_response(query, retrieved)
+
+
+def answer_locally(session_id, history, error):
+    """
+    Answer the newest message of history locally in place of the upstream, which
+    failed with error, and record the answer. Returns the response body.
+    """
+    with span("local_answer"):
+        answer = local_answer(history[-1]["content"])
+    active_conversations.append(session_id, {"role": "assistant", "content": answer["message"]})
+    reason = error.reason if isinstance(error, CircuitOpen) else "upstream_error"
+    LOCAL_ANSWERS.labels(reason).inc()
+    logger.warning(f"Answered session {session_id[:8]} locally ({reason}): {str(error)}")
+    return {
+        "message": answer["message"],
+        "session_id": session_id,
+        "source": answer["source"],
+        "type": "normal",
+        "degraded": True,
+        "reason": reason
+    }
+
+
+def stream_token(line):
+    """
+    Token carried by one line of an upstream completion stream: a string (possibly
+    empty), or None once the stream is finished. Raises ValueError on bad JSON.
+    """
+    # OpenAI-compatible streams send "data: {json}" lines and end with "data: [DONE]"
+    if not line or not line.startswith('data:'):
+        return ''
+    payload = line[len('data:'):].strip()
+    if payload == '[DONE]':
+        return None
+    choices = json.loads(payload).get('choices') or [{}]
+    return (choices[0].get('delta') or {}).get('content') or ''
+
+
+def upstream_error_message(e):
+    """Readable message for a failed upstream request"""
+    if hasattr(e, 'response') and e.response is not None:
+        return f"API error ({e.response.status_code}): {e.response.text if hasattr(e.response, 'text') else 'Unknown error'}"
+    return f"API request error: {str(e)}"
+
+
+def sse_event(payload, event=None):
+    """Format one Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(payload)}\n\n"
 
 @api.route('/chat', methods=['POST'])
 def chat():
@@ -43,119 +325,67 @@ def chat():
         }), 500
 
 @api.route('/live_chat', methods=['POST'])
+@admission_controlled
 def live_chat():
     """API endpoint for live chatbot interaction with external API (Groq)"""
     try:
         data = request.json
-        user_message = data.get('message', '')
-        session_id = data.get('session_id', None)
-        provider = data.get('provider', 'groq')
-        user_api_key = data.get('api_key', '')
+        session_id, api_key, history, error = start_conversation_turn(data)
+        if error:
+            return error
         
-        if not user_message:
-            return jsonify({"error": "No message provided"}), 400
-            
-        if not user_api_key:
-            return jsonify({"error": "No API key provided. Please set your Groq API key in the settings."}), 400
+        # Prepare messages including history for context (within the prompt token budget)
+        messages = build_messages(history)
+        
+        # Repeated and paraphrased questions are answered from the completion cache
+        bot_message = cached_completion(messages)
+        if bot_message is not None:
+            active_conversations.append(session_id, {"role": "assistant", "content": bot_message})
+            logger.info(f"Served cached completion for session {session_id[:8]}")
+            return jsonify({
+                "message": bot_message,
+                "session_id": session_id,
+                "source": "cache",
+                "type": "normal"
+            })
         
-        # Generate session ID if not provided
-        if not session_id:
-            session_id = str(uuid.uuid4())
-            # Initialize conversation history for new session
-            active_conversations[session_id] = []
+        # Use Groq API with LLaMA model
+        try:
+            # Concurrent identical turns wait for one upstream call; a failure (for
+            # example a bad API key) is not shared, each caller then tries its own key
+            bot_message = chat_flight.do(conversation_key('groq', UPSTREAM_MODEL, messages),
+                                         lambda: complete_upstream(api_key, messages, g.chat_deadline),
+                                         share_errors=False)
             
-        # Ensure session exists in our tracking
-        if session_id not in active_conversations:
-            active_conversations[session_id] = []
+            # Add bot response to conversation history
+            active_conversations.append(session_id, {
+                "role": "assistant",
+                "content": bot_message
+            })
             
-        # Add user message to conversation history
-        active_conversations[session_id].append({
-            "role": "user",
-            "content": user_message
-        })
-        
-        # Use user-provided API key
-        api_key = user_api_key
-        
-        # System prompt that defines the assistant's behavior
-        system_prompt = """
-        You are Asha, an AI career assistant designed to help women explore career opportunities,
-        job listings, professional development events, and mentorship programs. 
-        You provide supportive, encouraging, and bias-free guidance.
-        Keep responses concise and focused on empowering women in their careers.
-        """
-        
-        # Prepare messages including history for context
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add conversation history (up to last 10 messages)
-        history = active_conversations[session_id][-10:] if len(active_conversations[session_id]) > 10 else active_conversations[session_id]
-        messages.extend(history)
-        
-        if provider == 'groq' or provider == 'xai':
-            # Use Groq API with LLaMA model
-            try:
-                response = requests.post(
-                    'https://api.groq.com/openai/v1/chat/completions',
-                    headers={
-                        'Content-Type': 'application/json',
-                        'Authorization': f'Bearer {api_key}'
-                    },
-                    json={
-                        'messages': messages,
-                        'model': 'llama3-70b-8192',
-                        'temperature': 0.7,
-                        'max_tokens': 800
-                    },
-                    timeout=30  # 30 second timeout
-                )
-                
-                # Check response status
-                response.raise_for_status()
-                result = response.json()
-                
-                # Extract response content
-                if result and 'choices' in result and len(result['choices']) > 0:
-                    bot_message = result['choices'][0]['message']['content']
-                    
-                    # Add bot response to conversation history
-                    active_conversations[session_id].append({
-                        "role": "assistant",
-                        "content": bot_message
-                    })
-                    
-                    # Prepare the response
-                    api_response = {
-                        "message": bot_message,
-                        "session_id": session_id,
-                        "source": "groq_api",
-                        "type": "normal"
-                    }
-                    
-                    # Log success
-                    logger.info(f"Successfully got response from Groq API for session {session_id[:8]}")
-                    
-                    return jsonify(api_response)
-                else:
-                    raise ValueError("Invalid response format from API")
-                    
-            except requests.exceptions.RequestException as e:
-                logger.error(f"API request failed: {str(e)}")
-                if hasattr(e, 'response') and e.response is not None:
-                    error_msg = f"API error ({e.response.status_code}): {e.response.text if hasattr(e.response, 'text') else 'Unknown error'}"
-                else:
-                    error_msg = f"API request error: {str(e)}"
-                return jsonify({"error": error_msg}), 400
-                
-            except Exception as e:
-                logger.error(f"Error using Groq API: {str(e)}")
-                return jsonify({"error": f"Error: {str(e)}"}), 400
+            # Prepare the response
+            api_response = {
+                "message": bot_message,
+                "session_id": session_id,
+                "source": "groq_api",
+                "type": "normal"
+            }
+            
+            # Log success
+            logger.info(f"Successfully got response from Groq API for session {session_id[:8]}")
+            
+            return jsonify(api_response)
                 
-        else:
-            # Unsupported provider
-            return jsonify({
-                "error": f"Unsupported provider: {provider}. Only Groq/LLaMA models are supported."
-            }), 400
+        except (CircuitOpen, requests.exceptions.RequestException) as e:
+            if upstream_unavailable(e):
+                # Breaker open, deadline missed, or the upstream failed: answer locally instead
+                return jsonify(answer_locally(session_id, history, e))
+            logger.error(f"API request failed: {str(e)}")
+            return jsonify({"error": upstream_error_message(e)}), 400
+            
+        except Exception as e:
+            logger.error(f"Error using Groq API: {str(e)}")
+            return jsonify({"error": f"Error: {str(e)}"}), 400
             
     except Exception as e:
         logger.error(f"Error in live_chat endpoint: {str(e)}")
@@ -163,16 +393,87 @@ def live_chat():
             "error": f"Error processing request: {str(e)}"
         }), 500
 
-def fallback_to_local(user_message, session_id):
-    """Error handler for API failures that returns a consistent error message"""
-    logger.error(f"API request failed for session {session_id[:8]}")
-    
-    return jsonify({
-        "error": "I apologize, but I cannot connect to the AI service at the moment. Please check your API key and try again.",
-        "session_id": session_id,
-        "source": "error",
-        "type": "error"
-    }), 400
+@api.route('/live_chat/stream', methods=['POST'])
+@admission_controlled
+def live_chat_stream():
+    """Streaming variant of live_chat: relays upstream tokens to the browser as Server-Sent Events"""
+    try:
+        data = request.json
+        session_id, api_key, history, error = start_conversation_turn(data)
+        if error:
+            return error
+
+        messages = build_messages(history)
+
+        bot_message = cached_completion(messages)
+        if bot_message is not None:
+            active_conversations.append(session_id, {"role": "assistant", "content": bot_message})
+            logger.info(f"Served cached completion for session {session_id[:8]}")
+            cached = sse_event({"token": bot_message}) + sse_event({
+                "message": bot_message,
+                "session_id": session_id,
+                "source": "cache",
+                "type": "normal"
+            }, event='done')
+            return Response(cached, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+        # Open the upstream stream before answering so HTTP errors keep their status code
+        try:
+            # Time to the first byte of the stream; tokens are relayed afterwards
+            with span("upstream_llm_stream_open"):
+                upstream = get_client().chat_completion(api_key, chat_payload(messages, stream=True), stream=True,
+                                                        deadline=g.chat_deadline)
+            upstream.raise_for_status()
+        except (CircuitOpen, requests.exceptions.RequestException) as e:
+            if upstream_unavailable(e):
+                reply = answer_locally(session_id, history, e)
+                local = sse_event({"token": reply["message"]}) + sse_event(reply, event='done')
+                return Response(local, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+            logger.error(f"API request failed: {str(e)}")
+            return jsonify({"error": upstream_error_message(e)}), 400
+
+        def generate():
+            parts = []
+            try:
+                for line in upstream.iter_lines(decode_unicode=True):
+                    token = stream_token(line)
+                    if token is None:
+                        break
+                    if token:
+                        parts.append(token)
+                        yield sse_event({"token": token})
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.error(f"Streaming from Groq API failed: {str(e)}")
+                yield sse_event({"error": f"Stream interrupted: {str(e)}"}, event='error')
+                return
+            finally:
+                upstream.close()
+
+            # Only a completed answer becomes part of the conversation history
+            bot_message = ''.join(parts)
+            remember_completion(messages, bot_message)
+            active_conversations.append(session_id, {
+                "role": "assistant",
+                "content": bot_message
+            })
+            logger.info(f"Streamed response from Groq API for session {session_id[:8]}")
+            yield sse_event({
+                "message": bot_message,
+                "session_id": session_id,
+                "source": "groq_api",
+                "type": "normal"
+            }, event='done')
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # disable proxy buffering so tokens arrive as they are produced
+        })
+
+    except Exception as e:
+        logger.error(f"Error in live_chat_stream endpoint: {str(e)}")
+        return jsonify({
+            "error": f"Error processing request: {str(e)}"
+        }), 500
 
 @api.route('/clear_session', methods=['POST'])
 def clear_session():
@@ -183,8 +484,7 @@ def clear_session():
     if not session_id:
         return jsonify({"error": "No session_id provided"}), 400
         
-    if session_id in active_conversations:
-        active_conversations[session_id] = []
+    active_conversations.delete(session_id)
         
     return jsonify({"success": True, "message": "Session cleared"})
 
@@ -196,10 +496,41 @@ def session_history():
     if not session_id:
         return jsonify({"error": "No session_id provided"}), 400
         
-    history = active_conversations.get(session_id, [])
+    history = active_conversations.get(session_id)
     
     return jsonify({
         "session_id": session_id,
         "history": history,
         "message_count": len(history)
-    }) 
\ No newline at end of file
+    }) 
+
+@api.route('/ready', methods=['GET'])
+def ready():
+    """Readiness of background components plus the startup profile"""
+    if rag_warmup_enabled():
+        status = rag_warmup().status()
+        ready = status["ready"]
+    else:
+        # Nothing to wait for: the routes only use the pipeline once it is ready
+        status, ready = "disabled", True
+    return jsonify({
+        "ready": ready,
+        "rag_pipeline": status,
+        "startup_profile": PROFILE.as_dict(),
+        "memory": memory_usage()
+    }), 200 if ready else 503
+
+@api.route('/stats', methods=['GET'])
+def stats():
+    """Upstream connection, circuit breaker, cache, session and request coalescing counters"""
+    cache = get_completion_cache()
+    return jsonify({
+        "upstream": get_client().stats(),
+        "async_upstream": get_async_client().stats(),
+        "upstream_breaker": get_upstream_breaker().stats(),
+        "single_flight": {name: flight.stats() for name, flight in list(FLIGHTS.items())},
+        "sessions": active_conversations.stats(),
+        "history_packer": get_history_packer().stats(),
+        "completion_cache": cache.stats() if cache else None,
+        "admission": get_admission().stats()
+    })
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, make_response, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, make_response, send_from_directory
 import os
 import sys
 import logging
@@ -31,6 +31,16 @@ except ImportError:
 
 app.register_blueprint(api, url_prefix='/api')
 
+# Stage latency histograms and counters, served at /metrics
+from src.metrics import REGISTRY
+
+# Build the RAG pipeline (encoder, indexes) on a background thread so the
+# worker answers requests immediately; /api/ready reports when it is done
+from src.startup import rag_warmup, rag_warmup_enabled
+
+if rag_warmup_enabled():
+    rag_warmup().start()
+
 # Custom static files handler with stricter cache control
 @app.route('/static/<path:path>')
 def serve_static(path):
@@ -64,6 +74,11 @@ def home():
         
     return render_template('index.html', cache_bust=timestamp)
 
+@app.route('/metrics')
+def metrics():
+    """Stage latencies and component counters in Prometheus text format (see src/metrics.py)"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/manifest.json')
 def manifest():
     """Serve the manifest file for PWA support"""
@@ -0,0 +1,243 @@
+"""
+Async (ASGI) versions of the live chat endpoints.
+
+Served by asgi.py: `/api/live_chat` and `/api/live_chat/stream` run on the event
+loop, so a request waiting on the upstream LLM costs a coroutine instead of a
+worker thread. Every other route (pages, static files and the remaining /api/*
+endpoints) is the unchanged Flask app, mounted behind them. Request validation,
+history packing, caching and session storage are shared with app/api_routes.py.
+
+Blocking work is kept off the event loop: session store calls run in the default
+thread pool, and completion-cache lookups and stores, which may encode text with
+the RAG encoder, run in a small bounded executor (ASHA_ENCODE_WORKERS threads).
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from src.admission import Rejected, get_admission
+from src.circuit_breaker import CircuitOpen
+from src.completion_cache import conversation_key
+from src.metrics import span
+from src.single_flight import AsyncSingleFlight
+from src.upstream import get_async_client, upstream_unavailable
+
+from .api_routes import (CHAT_DEADLINE, CHAT_RESPONSES, UPSTREAM_MODEL, active_conversations, answer_locally, build_messages,
+                         cached_completion, chat_payload, completion_result, rejection_response,
+                         remember_completion, sse_event, start_conversation_turn, stream_token,
+                         upstream_error_message)
+
+logger = logging.getLogger(__name__)
+
+# CPU-bound encoding is bounded so a burst of chats cannot queue unbounded model work
+encode_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ASHA_ENCODE_WORKERS', '2')),
+                                     thread_name_prefix='encode')
+
+# Identical concurrent chat turns on this event loop share one upstream call
+chat_flight = AsyncSingleFlight("live_chat_async")
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # disable proxy buffering so tokens arrive as they are produced
+}
+
+
+async def offload(func, *args):
+    """Run a CPU-bound call on the bounded encode executor"""
+    return await asyncio.get_running_loop().run_in_executor(encode_executor, functools.partial(func, *args))
+
+
+class TicketReleasingResponse:
+    """ASGI wrapper sending response, then releasing the admission ticket however sending ended"""
+
+    def __init__(self, response, ticket):
+        self.response = response
+        self.ticket = ticket
+        self.status_code = response.status_code
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+def admission_controlled(handler):
+    """Async counterpart of api_routes.admission_controlled; waiting for a slot does not block the loop"""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        request.state.chat_deadline = time.monotonic() + CHAT_DEADLINE
+        try:
+            data = await request.json()
+        except ValueError:
+            data = {}
+        try:
+            ticket = await get_admission().admit_async(data.get('api_key', ''), data.get('session_id'))
+        except Rejected as e:
+            logger.warning(f"Shed {request.url.path} request: {e.reason}")
+            CHAT_RESPONSES.labels(request.url.path, "429").inc()
+            return JSONResponse(*rejection_response(e))
+        try:
+            with span(handler.__name__):
+                response = await handler(request)
+        except BaseException:
+            ticket.release()
+            raise
+        CHAT_RESPONSES.labels(request.url.path, str(response.status_code)).inc()
+        if isinstance(response, StreamingResponse):
+            # Hold the slot while the body is sent; released even if the client
+            # goes away before Starlette starts iterating the body
+            return TicketReleasingResponse(response, ticket)
+        ticket.release()
+        return response
+    return wrapper
+
+
+async def begin_turn(request):
+    """Parse and validate the request and record the user message (see start_conversation_turn)"""
+    data = await request.json()
+    return await run_in_threadpool(start_conversation_turn, data)
+
+
+async def record_answer(session_id, bot_message):
+    await run_in_threadpool(active_conversations.append, session_id, {"role": "assistant", "content": bot_message})
+
+
+async def complete_upstream(api_key, messages, deadline=None):
+    """Non-streaming completion for messages, awaited without holding a thread"""
+    with span("upstream_llm"):
+        response = await get_async_client().chat_completion(api_key, chat_payload(messages), deadline=deadline)
+    response.raise_for_status()
+    return await offload(completion_result, messages, response.json())
+
+
+@admission_controlled
+async def live_chat(request: Request):
+    """Async /api/live_chat: same request and response bodies as the Flask route"""
+    try:
+        session_id, api_key, history, error = await begin_turn(request)
+        if error:
+            return JSONResponse(*error)
+
+        messages = build_messages(history)
+
+        bot_message = await offload(cached_completion, messages)
+        source = "cache"
+        if bot_message is None:
+            source = "groq_api"
+            try:
+                bot_message = await chat_flight.do(conversation_key('groq', UPSTREAM_MODEL, messages),
+                                                   lambda: complete_upstream(api_key, messages,
+                                                                             request.state.chat_deadline),
+                                                   share_errors=False)
+            except (CircuitOpen, httpx.HTTPError) as e:
+                if upstream_unavailable(e):
+                    # Local retrieval may encode the query, so it runs on the encode executor
+                    return JSONResponse(await offload(answer_locally, session_id, history, e))
+                logger.error(f"API request failed: {str(e)}")
+                return JSONResponse({"error": upstream_error_message(e)}, 400)
+            except Exception as e:
+                logger.error(f"Error using Groq API: {str(e)}")
+                return JSONResponse({"error": f"Error: {str(e)}"}, 400)
+
+        await record_answer(session_id, bot_message)
+        logger.info(f"Answered live chat ({source}) for session {session_id[:8]}")
+        return JSONResponse({
+            "message": bot_message,
+            "session_id": session_id,
+            "source": source,
+            "type": "normal"
+        })
+
+    except Exception as e:
+        logger.error(f"Error in live_chat endpoint: {str(e)}")
+        return JSONResponse({"error": f"Error processing request: {str(e)}"}, 500)
+
+
+@admission_controlled
+async def live_chat_stream(request: Request):
+    """Async /api/live_chat/stream: relays upstream tokens as Server-Sent Events"""
+    try:
+        session_id, api_key, history, error = await begin_turn(request)
+        if error:
+            return JSONResponse(*error)
+
+        messages = build_messages(history)
+
+        bot_message = await offload(cached_completion, messages)
+        if bot_message is not None:
+            await record_answer(session_id, bot_message)
+            cached = sse_event({"token": bot_message}) + sse_event({
+                "message": bot_message,
+                "session_id": session_id,
+                "source": "cache",
+                "type": "normal"
+            }, event='done')
+            return StreamingResponse(iter([cached]), media_type='text/event-stream', headers=SSE_HEADERS)
+
+        # Open the upstream stream before answering so HTTP errors keep their status code
+        try:
+            with span("upstream_llm_stream_open"):
+                upstream = await get_async_client().chat_completion(api_key, chat_payload(messages, stream=True),
+                                                                    stream=True,
+                                                                    deadline=request.state.chat_deadline)
+            upstream.raise_for_status()
+        except (CircuitOpen, httpx.HTTPError) as e:
+            if upstream_unavailable(e):
+                reply = await offload(answer_locally, session_id, history, e)
+                local = sse_event({"token": reply["message"]}) + sse_event(reply, event='done')
+                return StreamingResponse(iter([local]), media_type='text/event-stream', headers=SSE_HEADERS)
+            logger.error(f"API request failed: {str(e)}")
+            return JSONResponse({"error": upstream_error_message(e)}, 400)
+
+        async def generate():
+            parts = []
+            try:
+                async for line in upstream.aiter_lines():
+                    token = stream_token(line)
+                    if token is None:
+                        break
+                    if token:
+                        parts.append(token)
+                        yield sse_event({"token": token})
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Streaming from Groq API failed: {str(e)}")
+                yield sse_event({"error": f"Stream interrupted: {str(e)}"}, event='error')
+                return
+            finally:
+                await upstream.aclose()
+
+            # Only a completed answer becomes part of the conversation history
+            bot_message = ''.join(parts)
+            await offload(remember_completion, messages, bot_message)
+            await record_answer(session_id, bot_message)
+            logger.info(f"Streamed response from Groq API for session {session_id[:8]}")
+            yield sse_event({
+                "message": bot_message,
+                "session_id": session_id,
+                "source": "groq_api",
+                "type": "normal"
+            }, event='done')
+
+        return StreamingResponse(generate(), media_type='text/event-stream', headers=SSE_HEADERS)
+
+    except Exception as e:
+        logger.error(f"Error in live_chat_stream endpoint: {str(e)}")
+        return JSONResponse({"error": f"Error processing request: {str(e)}"}, 500)
+
+
+# Matched before the mounted Flask app, which serves everything else
+routes = [
+    Route('/api/live_chat', live_chat, methods=['POST']),
+    Route('/api/live_chat/stream', live_chat_stream, methods=['POST']),
+]
@@ -242,8 +242,12 @@ document.addEventListener('DOMContentLoaded', function() {
             localStorage.setItem('asha_session_id', sessionId);
         }
         
-        // Call the live chat API endpoint
-        callLiveChatAPI(message, sessionId);
+        // Stream the answer where the browser supports it, otherwise wait for the full reply
+        if (window.ReadableStream && window.TextDecoder) {
+            callLiveChatStream(message, sessionId);
+        } else {
+            callLiveChatAPI(message, sessionId);
+        }
     }
     
     // Function to add message to chat
@@ -283,13 +287,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const contentElement = document.createElement('div');
         contentElement.classList.add('message-content');
         
-        // Check if color chart is enabled and this is a bot message
-        if (colorChartEnabled && role === 'assistant') {
-            contentElement.innerHTML = formatWithColorChart(content);
-        } else {
-            // Handle line breaks properly
-            contentElement.innerHTML = content.replace(/\n/g, '<br>');
-        }
+        renderMessageContent(contentElement, role, content);
         
         // Add content to the message element
         messageElement.appendChild(contentElement);
@@ -298,6 +296,19 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Scroll to bottom
         scrollToBottom();
+        
+        return contentElement;
+    }
+    
+    // Function to (re)render the text of a message
+    function renderMessageContent(contentElement, role, content) {
+        // Check if color chart is enabled and this is a bot message
+        if (colorChartEnabled && role === 'assistant') {
+            contentElement.innerHTML = formatWithColorChart(content);
+        } else {
+            // Handle line breaks properly
+            contentElement.innerHTML = content.replace(/\n/g, '<br>');
+        }
     }
     
     // Format message with color chart 
@@ -418,6 +429,99 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Function to call the streaming live chat API and render tokens as they arrive
+    async function callLiveChatStream(userMessage, sessionId) {
+        let contentElement = null;
+        let text = '';
+        try {
+            const response = await fetch('/api/live_chat/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    message: userMessage,
+                    session_id: sessionId,
+                    provider: 'xai',
+                    api_key: apiKey
+                })
+            });
+            
+            if (!response.ok) {
+                const errorText = await response.text();
+                console.error("API Error Response:", errorText);
+                let errorMessage = errorText;
+                try {
+                    errorMessage = JSON.parse(errorText).error || errorText;
+                } catch (parseError) {
+                    // Not JSON; show the raw text
+                }
+                throw new Error(errorMessage);
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                
+                // Server-Sent Events are separated by a blank line
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    
+                    let event = 'message';
+                    let payload = '';
+                    frame.split('\n').forEach(line => {
+                        if (line.startsWith('event:')) event = line.slice(6).trim();
+                        else if (line.startsWith('data:')) payload += line.slice(5).trim();
+                    });
+                    if (!payload) continue;
+                    const data = JSON.parse(payload);
+                    
+                    if (event === 'error') {
+                        throw new Error(data.error);
+                    }
+                    if (event === 'done') {
+                        text = data.message;
+                    } else if (data.token) {
+                        text += data.token;
+                    }
+                    
+                    // Replace the typing indicator with the message on the first token
+                    if (!contentElement) {
+                        hideTypingIndicator();
+                        contentElement = addMessageToChat('assistant', text);
+                    } else {
+                        renderMessageContent(contentElement, 'assistant', text);
+                        scrollToBottom();
+                    }
+                }
+            }
+            
+            if (!contentElement) {
+                throw new Error('The stream ended without a response');
+            }
+            if (text.length > 80) {
+                contentElement.parentElement.classList.add('long-message');
+            }
+            
+            // Reset API failure count on success
+            apiFailureCount = 0;
+            
+        } catch (error) {
+            console.error('Error calling Live Chat stream:', error);
+            hideTypingIndicator();
+            
+            // Show error message
+            addMessageToChat('assistant', `Error: ${error.message || 'Could not connect to the API'}. Please check your API key and try again.`);
+        }
+    }
+    
     // Progressive Web App support
     if ('serviceWorker' in navigator) {
         window.addEventListener('load', () => {
@@ -1,5 +1,5 @@
 // Asha Chatbot - Service Worker for PWA support
-const CACHE_NAME = 'asha-chatbot-v1';
+const CACHE_NAME = 'asha-chatbot-v2';
 const ASSETS_TO_CACHE = [
   '/',
   '/static/css/style.css',
@@ -44,9 +44,10 @@ self.addEventListener('activate', event => {
 
 // Fetch event - serve from cache if available, otherwise fetch from network
 self.addEventListener('fetch', event => {
-  // Skip cross-origin requests and API calls
+  // Skip cross-origin requests and API calls (including our own streamed /api/ responses)
   if (
     !event.request.url.startsWith(self.location.origin) || 
+    new URL(event.request.url).pathname.startsWith('/api/') ||
     event.request.url.includes('api.x.ai') ||
     event.request.url.includes('generativelanguage.googleapis.com')
   ) {
@@ -0,0 +1,42 @@
+"""
+ASGI entry point for the Asha AI Chatbot.
+
+The live chat endpoints run as async handlers (app/async_routes.py), so one
+worker holds hundreds of chats that are waiting on the LLM; every other route is
+the Flask app from wsgi.py, mounted behind them.
+
+    gunicorn -c gunicorn_asgi.conf.py asgi:application
+    uvicorn asgi:application --port 5000
+"""
+import os
+import sys
+from contextlib import asynccontextmanager
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.startup import PROFILE
+
+with PROFILE.phase("import app"):
+    from a2wsgi import WSGIMiddleware
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+
+    from app.app import app
+    from app.async_routes import routes
+    from src.upstream import get_async_client
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    yield
+    await get_async_client().aclose()
+
+
+# This is what Gunicorn/Uvicorn will look for
+application = Starlette(routes=routes + [Mount('/', app=WSGIMiddleware(app))], lifespan=lifespan)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(application, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
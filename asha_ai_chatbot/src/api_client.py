@@ -4,10 +4,17 @@ Handles interactions with the Groq API
 """
 
 import os
+import sys
 import requests
 import logging
 from dotenv import load_dotenv
 
+# The pooled upstream client lives in the repository-level src/ (both src/
+# directories are namespace packages, so they merge once the root is on the path)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.completion_cache import get_completion_cache
+from src.upstream import get_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -31,11 +38,11 @@ class GroqAPIClient:
         if not self.api_key:
             logger.warning("No API key provided. API calls will fail.")
         
-        self.base_url = "https://api.groq.com/openai/v1"
-        self.headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        # Shared keep-alive connection pool (one session per API key) with timeouts and retries
+        self.upstream = get_client()
+        self.base_url = self.upstream.base_url
+        # Exact and semantic cache of earlier completions (None when disabled)
+        self.cache = get_completion_cache()
         logger.info("Groq API client initialized")
     
     def chat_completion(self, messages, model="llama3-70b-8192", temperature=0.7, max_tokens=800):
@@ -49,9 +56,17 @@ class GroqAPIClient:
             max_tokens (int): Maximum number of tokens to generate
             
         Returns:
-            dict: The API response
+            dict: The API response (with "cached": True when served from the completion cache)
         """
-        endpoint = f"{self.base_url}/chat/completions"
+        if self.cache:
+            cached = self.cache.lookup("groq", model, messages)
+            if cached is not None:
+                logger.info("Served completion from cache")
+                return {
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": cached}, "finish_reason": "stop"}],
+                    "cached": True
+                }
         
         # Prepare request data
         data = {
@@ -63,11 +78,14 @@ class GroqAPIClient:
         
         try:
             logger.info(f"Sending request to Groq API with model: {model}")
-            response = requests.post(endpoint, headers=self.headers, json=data)
+            response = self.upstream.chat_completion(self.api_key, data)
             response.raise_for_status()  # Raise exception for HTTP errors
             
             result = response.json()
             logger.info("Successfully received response from Groq API")
+            if self.cache and result.get("choices"):
+                self.cache.store("groq", model, messages, result["choices"][0]["message"]["content"],
+                                 (result.get("usage") or {}).get("total_tokens", 0))
             return result
             
         except requests.exceptions.RequestException as e:
@@ -5,10 +5,19 @@ Handles integration between API, UI, and business logic
 
 import logging
 import os
+import sys
+import requests
 from typing import Dict, List, Optional, Any, Union
 from .rag_pipeline import RAGPipeline
 import uuid
 
+# Session storage and history packing live in the repository-level src/ (see api_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.circuit_breaker import CircuitOpen
+from src.history_packer import get_history_packer
+from src.session_store import make_session_store
+from src.upstream import upstream_unavailable
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,7 +45,9 @@ class AshaAIBot:
             else:
                 logger.warning("Groq API integration disabled - no API key found")
                 
-            self.conversation_history = {}
+            # Bounded, expiring per-session history (ASHA_SESSION_STORE=sqlite shares it across processes)
+            self.conversation_history = make_session_store(namespace="asha_ai_chatbot")
+            self._api_client = None
             
         except Exception as e:
             logger.error(f"Error initializing AshaAIBot: {str(e)}")
@@ -97,24 +108,27 @@ class AshaAIBot:
         if not session_id:
             session_id = "default"
             
-        # Initialize conversation history for this session if it doesn't exist
-        if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
-        
         # Track conversation for context
-        self.conversation_history[session_id].append({"role": "user", "content": user_message})
+        self.conversation_history.append(session_id, {"role": "user", "content": user_message})
         
         try:
             # Use API if enabled and requested
             if self.api_enabled and use_api:
                 logger.info("Using Groq API for response generation")
-                response = self._generate_api_response(user_message, session_id)
+                try:
+                    response = self._generate_api_response(user_message, session_id)
+                except (CircuitOpen, requests.exceptions.RequestException) as e:
+                    # Upstream down or its circuit breaker open: answer locally instead of erroring
+                    if not upstream_unavailable(e):
+                        raise
+                    logger.warning(f"Groq API unavailable ({str(e)}), using local response generation")
+                    response = self._generate_local_response(user_message)
             else:
                 logger.info("Using local response generation")
                 response = self._generate_local_response(user_message)
                 
             # Add response to conversation history
-            self.conversation_history[session_id].append({"role": "assistant", "content": response["message"]})
+            self.conversation_history.append(session_id, {"role": "assistant", "content": response["message"]})
             
             return response
             
@@ -140,8 +154,10 @@ class AshaAIBot:
         """
         from .api_client import GroqAPIClient
         
-        # Initialize API client
-        client = GroqAPIClient(api_key=self.groq_api_key)
+        # Create the API client once; its connections are pooled and reused across turns
+        if self._api_client is None:
+            self._api_client = GroqAPIClient(api_key=self.groq_api_key)
+        client = self._api_client
         
         # Create system message with context
         system_message = """
@@ -159,12 +175,9 @@ class AshaAIBot:
         except Exception as e:
             logger.warning(f"Error retrieving context from RAG pipeline: {str(e)}")
         
-        # Prepare conversation history for API
-        messages = [{"role": "system", "content": system_message}]
-        
-        # Add relevant conversation history (last 5 exchanges)
-        if len(self.conversation_history[session_id]) > 0:
-            messages.extend(self.conversation_history[session_id][-min(10, len(self.conversation_history[session_id])):])
+        # Prepare conversation history for API: the recent turns that fit the prompt
+        # token budget, with older ones summarized into the system message
+        messages = get_history_packer().pack(system_message, self.conversation_history.get(session_id))
         
         # Make API call
         try:
@@ -253,10 +266,11 @@ class AshaAIBot:
         """
         if session_id:
             if session_id in self.conversation_history:
-                del self.conversation_history[session_id]
+                self.conversation_history.delete(session_id)
                 logger.info(f"Conversation history cleared for session {session_id}")
         else:
-            self.conversation_history = {}
+            self.conversation_history.clear()
+            self._api_client = None
             logger.info("All conversation history cleared")
         
     def get_conversation_history(self, session_id: str = None) -> List[Dict[str, str]]:
@@ -270,5 +284,5 @@ class AshaAIBot:
             List of conversation messages
         """
         if session_id:
-            return self.conversation_history.get(session_id, [])
-        return self.conversation_history 
\ No newline at end of file
+            return self.conversation_history.get(session_id)
+        return self.conversation_history.sessions()
\ No newline at end of file
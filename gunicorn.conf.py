@@ -0,0 +1,70 @@
+"""
+Gunicorn configuration for the Asha AI Chatbot.
+
+With preloading (the default), the master imports the app and builds the RAG
+pipeline (encoder weights, memory-mapped embedding indexes, fused search matrix,
+router) before forking, so workers share those pages instead of each loading a
+copy. Every worker logs its memory use after it starts; /api/ready reports it too.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Set ASHA_PRELOAD=0 to load the app separately in every worker. With more than one
+worker, conversation history defaults to the SQLite session store so every worker
+sees the same sessions.
+"""
+
+import gc
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.startup import PROFILE, memory_usage, rag_warmup, rag_warmup_enabled
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Threaded workers: concurrent identical requests in a worker are coalesced into one
+# upstream call or search (src/single_flight.py) and concurrent query encodes into one batch
+threads = int(os.environ.get("ASHA_THREADS", "4"))
+# Admission control sizes its thread limiter to this (src/admission.py)
+os.environ["ASHA_WORKER_THREADS"] = str(threads)
+preload_app = os.environ.get("ASHA_PRELOAD", "1") != "0"
+rag_enabled = rag_warmup_enabled()
+
+if workers > 1:
+    # Per-process history would follow whichever worker served each request
+    os.environ.setdefault("ASHA_SESSION_STORE", "sqlite")
+
+if preload_app:
+    # Build the pipeline without a trial encode: the model's thread pools must
+    # not be started in a process that forks afterwards
+    os.environ["ASHA_PRELOAD_MASTER"] = "1"
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before workers are forked"""
+    if preload_app and rag_enabled:
+        try:
+            rag_warmup().get()
+        except Exception as e:
+            server.log.error(f"RAG pipeline preload failed, workers will retry: {e}")
+        server.log.info("Startup profile:\n" + PROFILE.report())
+    # Objects that exist now are never collected; keeping the collector away from
+    # them keeps their pages shared with the workers
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Master memory before fork: {memory_usage()}")
+
+
+def post_fork(server, worker):
+    os.environ.pop("ASHA_PRELOAD_MASTER", None)
+    warmup = rag_warmup()
+    if rag_enabled and warmup.error is not None:
+        warmup.reset().start()
+
+
+def post_worker_init(worker):
+    worker.log.info(f"Worker memory after init: {memory_usage()}")
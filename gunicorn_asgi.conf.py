@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration for the ASGI serving mode (asgi.py).
+
+Same settings and hooks as gunicorn.conf.py (preloading, shared memory, worker
+count), but each worker runs an asyncio event loop under uvicorn, so a chat that
+waits on the upstream LLM no longer occupies a whole worker.
+
+    gunicorn -c gunicorn_asgi.conf.py asgi:application
+"""
+
+import os
+
+_base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+with open(_base) as _f:
+    exec(compile(_f.read(), _base, "exec"))
+
+worker_class = "uvicorn.workers.UvicornWorker"
+# Concurrency comes from the event loop, not from worker threads
+threads = 1
+# Live chat runs on the event loop under the async limiter; the thread limiter keeps its plain defaults
+os.environ.pop("ASHA_WORKER_THREADS", None)
@@ -0,0 +1,335 @@
+"""
+Admission control for the live chat endpoints.
+
+A burst of slow upstream calls used to queue every request behind it until the
+30 second upstream timeout. `AdmissionController` sheds load early instead:
+
+- `RateLimiter`: a token bucket per API key and per session (refilling at
+  rate_per_minute, holding up to `burst` tokens).
+- `ConcurrencyLimiter`: at most `max_concurrent` chats in progress, at most
+  `max_queue` more waiting up to `queue_timeout` seconds for a slot; beyond that
+  the request is rejected immediately. `AsyncConcurrencyLimiter` is the same for
+  the ASGI routes, with FIFO hand-off between coroutines.
+
+A threaded gunicorn worker only runs `threads` requests at once, so the thread
+limiter must admit fewer than that or it never queues or sheds anything; its
+defaults are derived from ASHA_WORKER_THREADS (exported by gunicorn.conf.py).
+
+A rejection raises `Rejected` carrying a Retry-After estimate (from the bucket
+refill time, or from recent chat durations and the queue depth), which the
+routes turn into a 429. Limits are per process, so each worker enforces them
+separately.
+"""
+
+import asyncio
+import collections
+import hashlib
+import math
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Rejected(Exception):
+    def __init__(self, message: str, retry_after: int, reason: str):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class RateLimiter:
+    def __init__(self,
+                 name: str,
+                 rate_per_minute: float,
+                 burst: Optional[float] = None,
+                 max_keys: int = 100000):
+        """Token bucket per key; rate_per_minute <= 0 disables the limiter"""
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst if burst is not None else max(1.0, rate_per_minute / 4)
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.rejected = 0
+        # key -> [tokens, last refill time]; the least recently seen keys are dropped first
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Take one token for key: 0.0 when allowed, else seconds until a token is available"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                self.allowed += 1
+                return 0.0
+            self.rejected += 1
+            return (1.0 - bucket[0]) / self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "rejected": self.rejected}
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64, queue_timeout: float = 5.0):
+        """At most max_concurrent holders; max_queue callers may wait up to queue_timeout seconds"""
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self.hold_seconds = 1.0
+        self._cond = threading.Condition()
+
+    def retry_after(self) -> int:
+        """Seconds until a rejected caller can expect a free slot"""
+        return max(1, math.ceil(self.hold_seconds * (self.queued + 1) / self.max_concurrent))
+
+    def _reject(self, timed_out: bool) -> Rejected:
+        if timed_out:
+            self.rejected_timeout += 1
+        else:
+            self.rejected_full += 1
+        return Rejected("The assistant is busy right now, please retry shortly.", self.retry_after(), "busy")
+
+    def _admitted(self) -> float:
+        self.admitted += 1
+        return time.monotonic()
+
+    def _record_hold(self, started: float):
+        self.hold_seconds = 0.9 * self.hold_seconds + 0.1 * (time.monotonic() - started)
+
+    def acquire(self) -> float:
+        """Wait for a slot and return its start time, or raise Rejected"""
+        with self._cond:
+            if self.active < self.max_concurrent and not self.queued:
+                self.active += 1
+                return self._admitted()
+            if self.queued >= self.max_queue:
+                raise self._reject(timed_out=False)
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(timed_out=True)
+                    self._cond.wait(remaining)
+                self.active += 1
+            finally:
+                self.queued -= 1
+            return self._admitted()
+
+    def release(self, started: float):
+        with self._cond:
+            self.active -= 1
+            self._record_hold(started)
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "hold_seconds": round(self.hold_seconds, 3),
+        }
+
+
+class AsyncConcurrencyLimiter(ConcurrencyLimiter):
+    """ConcurrencyLimiter for coroutines of one event loop; a released slot passes to the oldest waiter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters: "collections.deque[asyncio.Future]" = collections.deque()
+
+    async def acquire(self) -> float:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return self._admitted()
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(timed_out=False)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued = len(self._waiters)
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            # asyncio.wait does not cancel the waiter, so a slot handed over at the
+            # deadline is still seen as ours
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except BaseException:
+            # Cancelled while waiting (the client went away): give up the place in
+            # the queue, or pass on a slot that was already handed to us
+            if waiter.done():
+                self._free_slot()
+            else:
+                self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            raise self._reject(timed_out=True)
+        return self._admitted()
+
+    def _abandon(self, waiter: asyncio.Future):
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        self.queued = len(self._waiters)
+
+    def _free_slot(self):
+        """Hand the slot to the oldest waiter, or give it back"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter; active stays the same
+                waiter.set_result(None)
+                self.queued = len(self._waiters)
+                return
+        self.queued = 0
+        self.active -= 1
+
+    def release(self, started: float):
+        self._record_hold(started)
+        self._free_slot()
+
+
+class Ticket:
+    """An admitted request; release() frees its concurrency slot (safe to call more than once)"""
+
+    def __init__(self, release: Callable[[], None]):
+        self._release = release
+        self._lock = threading.Lock()
+        self.released = False
+
+    def release(self):
+        with self._lock:
+            if self.released:
+                return
+            self.released = True
+        self._release()
+
+
+class AdmissionController:
+    def __init__(self,
+                 key_rate_per_minute: float = 60,
+                 session_rate_per_minute: float = 20,
+                 max_concurrent: int = 32,
+                 max_queue: int = 64,
+                 queue_timeout: float = 5.0,
+                 async_max_concurrent: Optional[int] = None,
+                 async_max_queue: Optional[int] = None):
+        """max_concurrent and max_queue bound the threaded routes; the async ones default to the same"""
+        self.by_key = RateLimiter("api_key", key_rate_per_minute)
+        self.by_session = RateLimiter("session", session_rate_per_minute)
+        self.concurrency = ConcurrencyLimiter(max_concurrent, max_queue, queue_timeout)
+        self.async_concurrency = AsyncConcurrencyLimiter(
+            max_concurrent if async_max_concurrent is None else async_max_concurrent,
+            max_queue if async_max_queue is None else async_max_queue,
+            queue_timeout
+        )
+
+    def check_rate(self, api_key: str, session_id: Optional[str]):
+        """Take a token from the API key's and the session's buckets, or raise Rejected"""
+        if api_key:
+            # Buckets are keyed by a digest so raw keys are not kept in memory
+            wait = self.by_key.acquire(hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+            if wait:
+                raise Rejected("Too many requests for this API key, please slow down.", math.ceil(wait), "api_key")
+        if session_id:
+            wait = self.by_session.acquire(session_id)
+            if wait:
+                raise Rejected("Too many messages in this conversation, please slow down.", math.ceil(wait),
+                               "session")
+
+    def admit(self, api_key: str, session_id: Optional[str]) -> Ticket:
+        """Rate-check the request and wait for a concurrency slot (threads)"""
+        self.check_rate(api_key, session_id)
+        started = self.concurrency.acquire()
+        return Ticket(lambda: self.concurrency.release(started))
+
+    async def admit_async(self, api_key: str, session_id: Optional[str]) -> Ticket:
+        """admit() for the ASGI routes; waiting for a slot does not block the event loop"""
+        self.check_rate(api_key, session_id)
+        started = await self.async_concurrency.acquire()
+        return Ticket(lambda: self.async_concurrency.release(started))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_limits": {"api_key": self.by_key.stats(), "session": self.by_session.stats()},
+            "concurrency": self.concurrency.stats(),
+            "async_concurrency": self.async_concurrency.stats(),
+        }
+
+
+def thread_limits(threads: int) -> Tuple[int, int]:
+    """
+    (max_concurrent, max_queue) for a worker running threads requests at once:
+    a quarter of the threads (at least one) wait in the queue, the rest run chats
+    """
+    queued = max(1, threads // 4) if threads > 1 else 0
+    return threads - queued, queued
+
+
+_admission: Optional[AdmissionController] = None
+_admission_lock = threading.Lock()
+
+
+def get_admission() -> AdmissionController:
+    """
+    Process-wide admission controller, configured from ASHA_RATE_KEY_PER_MIN,
+    ASHA_RATE_SESSION_PER_MIN (0 disables), ASHA_MAX_CONCURRENT_CHATS,
+    ASHA_MAX_QUEUED_CHATS and ASHA_QUEUE_TIMEOUT.
+
+    Unset, the async limits are 32 chats plus 64 queued, and the thread limits
+    follow from ASHA_WORKER_THREADS (see thread_limits) when it is known.
+    """
+    global _admission
+    with _admission_lock:
+        if _admission is None:
+            max_concurrent = os.getenv("ASHA_MAX_CONCURRENT_CHATS")
+            max_queue = os.getenv("ASHA_MAX_QUEUED_CHATS")
+            async_concurrent = int(max_concurrent or 32)
+            async_queue = int(max_queue or 64)
+            thread_concurrent, thread_queue = async_concurrent, async_queue
+            threads = int(os.getenv("ASHA_WORKER_THREADS", "0"))
+            if threads:
+                derived_concurrent, derived_queue = thread_limits(threads)
+                thread_concurrent = int(max_concurrent or derived_concurrent)
+                thread_queue = int(max_queue or derived_queue)
+                if thread_concurrent >= threads:
+                    logger.warning(f"ASHA_MAX_CONCURRENT_CHATS={thread_concurrent} is not below the worker's "
+                                   f"{threads} threads: chats will wait in gunicorn's backlog instead of being "
+                                   f"queued or shed with 429")
+            _admission = AdmissionController(
+                key_rate_per_minute=float(os.getenv("ASHA_RATE_KEY_PER_MIN", "60")),
+                session_rate_per_minute=float(os.getenv("ASHA_RATE_SESSION_PER_MIN", "20")),
+                max_concurrent=thread_concurrent,
+                max_queue=thread_queue,
+                queue_timeout=float(os.getenv("ASHA_QUEUE_TIMEOUT", "5")),
+                async_max_concurrent=async_concurrent,
+                async_max_queue=async_queue
+            )
+        return _admission
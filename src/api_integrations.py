@@ -1,13 +1,18 @@
-from typing import List, Dict, Any
+import copy
+from typing import List, Dict, Any, Optional
 from pathlib import Path
-import json
-import pandas as pd
+import numpy as np
+from .data_catalog import DataCatalog
+from .metrics import timed
 
 class APIIntegrations:
     def __init__(self):
         """Initialize API integrations with data paths"""
         self.data_path = Path(__file__).parent.parent / "data"
+        # Files are parsed once and re-read only when their mtime or size changes
+        self.catalog = DataCatalog(self.data_path)
         
+    @timed("fetch_job_listings")
     def fetch_job_listings(self, filters: dict = None) -> List[Dict[str, Any]]:
         """Fetch job listings from data file"""
         try:
@@ -16,13 +21,13 @@ class APIIntegrations:
                 print(f"Warning: Job listings file not found at {jobs_path}")
                 return []
             
-            df = pd.read_csv(jobs_path)
-            data = df.to_dict('records')
-            return self._apply_filters(data, filters) if filters else data
+            data = self.catalog.rows("jobs")
+            return self._apply_filters(data, filters, "jobs") if filters else list(data)
         except Exception as e:
             print(f"Error loading job listings: {e}")
             return []
 
+    @timed("fetch_events")
     def fetch_events(self) -> List[Dict[str, Any]]:
         """Fetch events from data file"""
         try:
@@ -31,12 +36,12 @@ class APIIntegrations:
                 print(f"Warning: Events file not found at {events_path}")
                 return []
                 
-            with open(events_path, 'r') as f:
-                return json.load(f)
+            return self._copy_rows(self.catalog.rows("sessions"))
         except Exception as e:
             print(f"Error loading events: {e}")
             return []
 
+    @timed("fetch_mentorship_programs")
     def fetch_mentorship_programs(self, filters: dict = None) -> List[Dict[str, Any]]:
         """Fetch mentorship programs from data file"""
         try:
@@ -45,17 +50,41 @@ class APIIntegrations:
                 print(f"Warning: Mentorship programs file not found at {mentorship_path}")
                 return []
                 
-            with open(mentorship_path, 'r') as f:
-                data = json.load(f)
-            return self._apply_filters(data, filters) if filters else data
+            data = self.catalog.rows("mentorship")
+            return self._copy_rows(self._apply_filters(data, filters, "mentorship") if filters else data)
         except Exception as e:
             print(f"Error loading mentorship programs: {e}")
             return []
 
-    def _apply_filters(self, data: List[Dict[str, Any]], filters: dict) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _copy_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Copies of cached JSON rows (nested lists included), so callers that edit
+        their results do not change the catalog. Job rows need no copy: JobCatalog
+        builds a new dict on every access.
+        """
+        return [copy.deepcopy(row) for row in rows]
+
+    def filter_positions(self,
+                         source: str,
+                         filters: dict,
+                         rows: Optional[List[Dict[str, Any]]] = None) -> Optional[np.ndarray]:
+        """Positions in the catalog rows of a source that match all filters (None if unfiltered)"""
+        if not filters or source == "sessions":
+            return None
+        return self.catalog.match(source, filters, rows)
+
+    def _apply_filters(self,
+                       data: List[Dict[str, Any]],
+                       filters: dict,
+                       source: Optional[str] = None) -> List[Dict[str, Any]]:
         """Apply filters to the data"""
         if not filters:
             return data
+
+        # Catalog rows are answered from the inverted field indexes
+        if source is not None:
+            return [data[i] for i in self.catalog.match(source, filters, data)]
             
         filtered_data = data.copy()
         for key, value in filters.items():
@@ -0,0 +1,108 @@
+"""
+Micro-batching front end for the sentence encoder.
+
+Concurrent callers submit single texts; a background thread gathers whatever
+arrives within `max_wait_ms` (or until `max_batch_size` texts are queued), runs
+them through the model as one batch, and resolves each caller's future. On CPU a
+batch of 16-32 short queries costs little more than a single one.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEncoder:
+    def __init__(self, model: Any, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """Wrap a model exposing encode(list_of_texts); max_wait_ms <= 0 disables batching"""
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait > 0 and self.max_batch_size > 1
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="batch-encoder", daemon=True)
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue one text for encoding; the future resolves to its embedding"""
+        future: Future = Future()
+        if not self.enabled:
+            try:
+                future.set_result(self._encode([text])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode one text, sharing a forward pass with concurrent callers"""
+        return self.submit(text).result()
+
+    def encode_many(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode several texts from one caller as a single batch"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._encode(list(texts))
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        self.batches += 1
+        self.items += len(texts)
+        return np.asarray(self.model.encode(texts, convert_to_numpy=True, batch_size=max(len(texts), 1)))
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            pending = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                vectors = self._encode([text for text, _ in pending])
+                for (_, future), vector in zip(pending, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                logger.error(f"Batch encode of {len(pending)} texts failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        """Number of model calls and texts encoded, plus the mean batch size"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0
+        }
@@ -1,35 +1,200 @@
 # src/bias_detection.py
+"""
+Bias detection over user queries and streamed model output.
+
+Curated phrases are loaded from data/bias_patterns.json and compiled into a
+word-level Aho-Corasick automaton, so one left-to-right pass over the text finds
+every phrase occurrence regardless of how many phrases are configured. The few
+entries that need real regular expressions are joined into one compiled
+pattern. `stream()` returns a scanner that keeps the automaton state between
+chunks, so LLM output can be checked as it arrives.
+"""
+
+import json
+import logging
 import re
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERNS_PATH = Path(__file__).parent.parent / "data" / "bias_patterns.json"
+DEFAULT_SUGGESTION = "Could you rephrase your question to focus on skills and qualifications?"
+
+# Used when the data file is missing
+DEFAULT_PHRASES = [
+    {"text": "women can't", "suggestion": "What are successful approaches in this field?"},
+    {"text": "women should", "suggestion": "What are the best practices in this profession?"},
+    {"text": "all women are"},
+    {"text": "females are not good at"},
+    {"text": "women belong"},
+    {"text": "men are better"},
+]
+
+# Words, keeping contractions such as "can't" together
+_WORD = re.compile(r"\w+(?:'\w+)*")
+_PARTIAL_WORD = re.compile(r"[\w']*$")
+# Typographic apostrophes are folded so "can’t" matches "can't" (same length, so spans are kept)
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'"})
+
+
+@dataclass
+class BiasMatch:
+    term: str
+    start: int
+    end: int
+    suggestion: Optional[str] = None
+
+
+class _PhraseAutomaton:
+    def __init__(self, phrases: Dict[Tuple[str, ...], str]):
+        """Aho-Corasick automaton whose alphabet is lowercased words"""
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # (term, length in words) of every phrase ending in each state
+        self.out: List[List[Tuple[str, int]]] = [[]]
+        self.max_words = max((len(words) for words in phrases), default=0)
+
+        for words, term in phrases.items():
+            state = 0
+            for word in words:
+                if word not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][word] = len(self.goto) - 1
+                state = self.goto[state][word]
+            self.out[state].append((term, len(words)))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                self.fail[child] = self.step(self.fail[state], word)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def step(self, state: int, word: str) -> int:
+        while state and word not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(word, 0)
+
+
+class BiasScanner:
+    def __init__(self, detector: "BiasDetectionModule", regex_window: int = 256):
+        """
+        Incremental scan of one text stream.
+
+        Text after the last word boundary is held back until the next chunk so
+        words split across chunks still match; regex patterns are re-run over the
+        last regex_window characters so matches spanning chunks are found too.
+        """
+        self.detector = detector
+        self.regex_window = regex_window
+        self._state = 0
+        self._word_starts: deque = deque(maxlen=max(detector.automaton.max_words, 1))
+        self._pending = ""
+        self._offset = 0    # stream position of the start of _pending
+        self._tail = ""     # already scanned text kept for regex patterns
+
+    def feed(self, chunk: str) -> List[BiasMatch]:
+        """Matches that are complete once chunk is appended"""
+        text = self._pending + chunk.translate(_APOSTROPHES)
+        cut = _PARTIAL_WORD.search(text).start()
+        self._pending = text[cut:]
+        return self._scan(text[:cut])
+
+    def close(self) -> List[BiasMatch]:
+        """Matches in the remaining held-back text at the end of the stream"""
+        text, self._pending = self._pending, ""
+        return self._scan(text)
+
+    def _scan(self, text: str) -> List[BiasMatch]:
+        if not text:
+            return []
+        base = self._offset
+        automaton = self.detector.automaton
+        matches = []
+        for word in _WORD.finditer(text):
+            self._state = automaton.step(self._state, word.group().lower())
+            self._word_starts.append(base + word.start())
+            for term, length in automaton.out[self._state]:
+                matches.append(BiasMatch(term, self._word_starts[-length], base + word.end(),
+                                         self.detector.suggestions.get(term)))
+
+        if self.detector.pattern is not None:
+            window = self._tail + text
+            window_start = base - len(self._tail)
+            for match in self.detector.pattern.finditer(window):
+                # Matches ending inside the tail were reported with the previous chunk
+                if match.end() > len(self._tail):
+                    term = self.detector.pattern_labels[match.lastgroup]
+                    matches.append(BiasMatch(term, window_start + match.start(), window_start + match.end(),
+                                             self.detector.suggestions.get(term)))
+            self._tail = window[-self.regex_window:]
+
+        self._offset = base + len(text)
+        matches.sort(key=lambda m: (m.start, m.end))
+        return matches
+
 
 class BiasDetectionModule:
-    def __init__(self):
+    def __init__(self, patterns_path: Optional[Path] = None):
+        """Load curated phrases and patterns and compile them into one matcher"""
+        phrases, patterns, self.default_suggestion = self._load(Path(patterns_path or DEFAULT_PATTERNS_PATH))
+
         # Words/phrases that might indicate gender bias
-        self.potentially_biased_terms = [
-            "women can't", "women should", "all women are", 
-            "females are not good at", "women belong", 
-            "men are better"
-        ]
-        
+        self.potentially_biased_terms = [entry["text"].lower() for entry in phrases]
+        self.suggestions: Dict[str, str] = {}
+        compiled: Dict[Tuple[str, ...], str] = {}
+        for entry in phrases:
+            term = entry["text"].lower()
+            compiled[tuple(word.lower() for word in _WORD.findall(term.translate(_APOSTROPHES)))] = term
+            if entry.get("suggestion"):
+                self.suggestions[term] = entry["suggestion"]
+        self.automaton = _PhraseAutomaton(compiled)
+
+        self.pattern_labels: Dict[str, str] = {}
+        alternatives = []
+        for i, entry in enumerate(patterns):
+            label = entry.get("label") or entry["pattern"]
+            self.pattern_labels[f"p{i}"] = label
+            alternatives.append(f"(?P<p{i}>{entry['pattern']})")
+            if entry.get("suggestion"):
+                self.suggestions[label] = entry["suggestion"]
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+    @staticmethod
+    def _load(path: Path) -> Tuple[List[Dict], List[Dict], str]:
+        if not path.exists():
+            logger.warning(f"Bias pattern file not found at {path}, using built-in phrases")
+            return DEFAULT_PHRASES, [], DEFAULT_SUGGESTION
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return data.get("phrases", []), data.get("patterns", []), data.get("default_suggestion", DEFAULT_SUGGESTION)
+
+    def stream(self, regex_window: int = 256) -> BiasScanner:
+        """Scanner for text that arrives in chunks (e.g. streamed LLM output)"""
+        return BiasScanner(self, regex_window)
+
+    def find_matches(self, text: str) -> List[BiasMatch]:
+        """Every phrase and pattern match in text, with character spans, in order"""
+        scanner = self.stream()
+        return scanner.feed(text) + scanner.close()
+
     def detect_bias(self, text):
         """Check for potentially biased language in user queries"""
-        text_lower = text.lower()
-        
-        for term in self.potentially_biased_terms:
-            if term in text_lower:
-                return True, term
-                
+        matches = self.find_matches(text)
+        if matches:
+            return True, matches[0].term
         return False, None
-    
+
+    def detect_bias_batch(self, texts: Sequence[str]) -> List[List[BiasMatch]]:
+        """All matches for each text (an empty list means no bias was found)"""
+        return [self.find_matches(text) for text in texts]
+
     def suggest_alternative(self, biased_term):
         """Provide suggestions for rephrasing biased queries"""
-        alternatives = {
-            "women can't": "What are successful approaches in this field?",
-            "women should": "What are the best practices in this profession?",
-            # Add more alternatives
-        }
-        
-        for term, suggestion in alternatives.items():
-            if term in biased_term:
-                return suggestion
-                
-        return "Could you rephrase your question to focus on skills and qualifications?"
\ No newline at end of file
+        return self.suggestions.get(biased_term, self.default_suggestion)
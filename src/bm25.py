@@ -0,0 +1,120 @@
+"""
+In-memory BM25 index and reciprocal rank fusion for hybrid retrieval.
+
+The index is an inverted file over the same descriptions that are embedded for
+dense search: each term maps to a contiguous slice of document numbers and term
+frequencies, so a query only touches the postings of its own terms. Short,
+exact-token queries (company names, job ids) can be answered from it without
+running the sentence encoder at all.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+# Words too common to make a query "keyword-like" on their own
+STOPWORDS = frozenset({
+    "a", "an", "and", "any", "at", "for", "from", "i", "in", "is", "me", "my", "of",
+    "on", "or", "show", "some", "the", "to", "with", "want", "need", "looking", "find"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        self.doc_ids = np.empty(0, dtype=np.int64)
+        self.idf = np.empty(0, dtype=np.float32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.int64)
+        self._weights = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def fit(self, texts: Sequence[str], doc_ids: Optional[Sequence[int]] = None) -> "BM25Index":
+        """Index texts; doc_ids (default 0..n-1, ascending) are returned by search"""
+        self.doc_ids = np.arange(len(texts), dtype=np.int64) if doc_ids is None else np.asarray(doc_ids, dtype=np.int64)
+        term_docs: Dict[str, List[int]] = {}
+        term_freqs: Dict[str, List[int]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc] = len(tokens)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_docs.setdefault(token, []).append(doc)
+                term_freqs.setdefault(token, []).append(count)
+
+        n_docs = max(len(texts), 1)
+        avg_length = float(lengths.mean()) if len(texts) else 0.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length) if avg_length else np.full(len(texts), self.k1)
+
+        self.vocabulary = {term: i for i, term in enumerate(term_docs)}
+        sizes = np.array([len(term_docs[term]) for term in term_docs], dtype=np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self._postings = np.fromiter((d for term in term_docs for d in term_docs[term]), dtype=np.int64, count=int(sizes.sum()))
+        tf = np.fromiter((f for term in term_docs for f in term_freqs[term]), dtype=np.float32, count=int(sizes.sum()))
+        self.idf = np.log(1 + (n_docs - sizes + 0.5) / (sizes + 0.5)).astype(np.float32)
+        # Precompute the tf part of each posting's score; a query then only sums idf * weight
+        self._weights = (tf * (self.k1 + 1) / (tf + norm[self._postings])).astype(np.float32)
+        return self
+
+    def query_terms(self, query: str) -> List[str]:
+        """Query tokens without stopwords"""
+        return [token for token in tokenize(query) if token not in STOPWORDS]
+
+    def covers(self, query: str, max_terms: int) -> bool:
+        """True for short queries whose every content term occurs in the corpus"""
+        terms = self.query_terms(query)
+        return 0 < len(terms) <= max_terms and all(term in self.vocabulary for term in terms)
+
+    def search(self,
+               query: str,
+               k: int,
+               candidates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k doc ids (restricted to candidate doc ids if given) with positive BM25 score"""
+        term_ids = [self.vocabulary[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocabulary]
+        if not term_ids or not len(self.doc_ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in term_ids:
+            start, end = self._offsets[term], self._offsets[term + 1]
+            scores[self._postings[start:end]] += self.idf[term] * self._weights[start:end]
+
+        if candidates is not None:
+            # Map candidate doc ids to internal numbers, ignoring ids that were never indexed
+            candidates = np.asarray(candidates, dtype=np.int64)
+            internal = np.searchsorted(self.doc_ids, candidates)
+            inside = internal < len(self.doc_ids)
+            internal = internal[inside][self.doc_ids[internal[inside]] == candidates[inside]]
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[internal] = True
+            scores[~mask] = 0
+
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+        hits = hits[np.argsort(scores[hits])[::-1]]
+        return self.doc_ids[hits], scores[hits]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int = 60) -> List[int]:
+    """Merge ranked id lists by summing 1 / (k + rank) for each list an id appears in"""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            fused[int(doc)] = fused.get(int(doc), 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)
@@ -0,0 +1,180 @@
+"""
+Circuit breaker for the upstream LLM API.
+
+When the upstream is failing or slow, every chat turn used to wait out the full
+read timeout before erroring. `CircuitBreaker` tracks the outcome of the last
+`window` calls and opens once enough of them failed (connection errors,
+timeouts, 5xx) or took longer than `slow_call_seconds`. While open, calls are
+refused immediately with `CircuitOpen`, so the routes can answer locally; after
+`open_seconds` the breaker goes half-open and lets `half_open_probes` calls
+through: a good probe closes it again, a failed or slow one reopens it.
+
+Callers may also pass a deadline (a `time.monotonic()` value): a call is refused
+up front when the time left is shorter than the recent latency of successful
+calls, since it would most likely not finish in time.
+
+`UpstreamClient` and `AsyncUpstreamClient` share the process-wide breaker from
+`get_upstream_breaker()`, configured from the environment:
+
+- ASHA_BREAKER_FAILURE_RATE   failed share of the window that opens it (default 0.5)
+- ASHA_BREAKER_SLOW_SECONDS   calls slower than this count as slow (default 5)
+- ASHA_BREAKER_SLOW_RATE      slow share of the window that opens it (default 0.8)
+- ASHA_BREAKER_OPEN_SECONDS   how long it stays open before probing (default 15)
+"""
+
+import collections
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """A call refused without being made: the breaker is open, or the deadline would be missed"""
+
+    def __init__(self, message: str, reason: str, retry_after: int = 0):
+        super().__init__(message)
+        self.message = message
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self,
+                 name: str,
+                 window: int = 20,
+                 min_calls: int = 5,
+                 failure_rate: float = 0.5,
+                 slow_call_seconds: float = 5.0,
+                 slow_rate: float = 0.8,
+                 open_seconds: float = 15.0,
+                 half_open_probes: int = 1):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        # Moving average of successful call durations, for deadline checks
+        self.latency: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.refused = 0
+        self.refused_deadline = 0
+        self.times_opened = 0
+        # (failed, slow) of the most recent calls
+        self._outcomes: "collections.deque[tuple]" = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._outcomes.clear()
+        logger.warning(f"Circuit {self.name} opened, refusing calls for {self.open_seconds:g}s")
+
+    def _refuse(self, message: str, reason: str, retry_after: float = 0) -> CircuitOpen:
+        self.refused += 1
+        return CircuitOpen(message, reason, max(1, math.ceil(retry_after)))
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        Permission to make one call, or raise CircuitOpen. Returns True when the
+        call is a half-open probe; pass that to record() afterwards.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN:
+                wait = self.opened_at + self.open_seconds - now
+                if wait > 0:
+                    raise self._refuse(f"{self.name} is unavailable", "open", wait)
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half-open, probing")
+            if self.state == HALF_OPEN:
+                if self.probes >= self.half_open_probes:
+                    raise self._refuse(f"{self.name} is being probed", "half_open", 1)
+                self.probes += 1
+                return True
+            if deadline is not None and deadline - now < (self.latency or 0.0):
+                self.refused_deadline += 1
+                raise self._refuse(f"{self.name} cannot answer before the deadline", "deadline")
+            return False
+
+    def record(self, probe: bool, elapsed: float, failed: Optional[bool]):
+        """
+        Outcome of a call allowed by acquire(). failed=None means the call ended
+        without telling anything about the upstream (for example it was cancelled).
+        """
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if probe:
+                self.probes -= 1
+            if failed is None:
+                return
+            self.calls += 1
+            self.failures += failed
+            self.slow_calls += slow
+            if not failed:
+                self.latency = elapsed if self.latency is None or probe else 0.8 * self.latency + 0.2 * elapsed
+
+            if probe:
+                if failed or slow:
+                    self._open(time.monotonic())
+                elif self.state == HALF_OPEN:
+                    self.state = CLOSED
+                    logger.info(f"Circuit {self.name} closed")
+                return
+            if self.state != CLOSED:
+                # Calls that started before the breaker opened do not count towards closing it
+                return
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) >= self.min_calls:
+                failures = sum(f for f, _ in self._outcomes) / len(self._outcomes)
+                slow_calls = sum(s for _, s in self._outcomes) / len(self._outcomes)
+                if failures >= self.failure_rate or slow_calls >= self.slow_rate:
+                    self._open(time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "refused": self.refused,
+                "refused_deadline": self.refused_deadline,
+                "times_opened": self.times_opened,
+                "latency_seconds": None if self.latency is None else round(self.latency, 3),
+            }
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_upstream_breaker() -> CircuitBreaker:
+    """The breaker shared by the sync and async upstream clients"""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                "upstream",
+                failure_rate=float(os.getenv("ASHA_BREAKER_FAILURE_RATE", "0.5")),
+                slow_call_seconds=float(os.getenv("ASHA_BREAKER_SLOW_SECONDS", "5")),
+                slow_rate=float(os.getenv("ASHA_BREAKER_SLOW_RATE", "0.8")),
+                open_seconds=float(os.getenv("ASHA_BREAKER_OPEN_SECONDS", "15"))
+            )
+        return _breaker
@@ -0,0 +1,204 @@
+"""
+Two-tier cache for LLM chat completions.
+
+Entries are namespaced by provider and model and keyed by the normalized message
+list (system prompt plus recent history). The exact tier is an `LRUCache` with a
+TTL. The semantic tier answers paraphrases: for the same conversation prefix
+(everything before the last user message) it compares the last user message's
+embedding with those of cached turns and reuses the answer above a cosine
+similarity threshold. Embeddings come from the RAG pipeline's query encoder, so
+the semantic tier switches itself on once the pipeline has warmed up.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import LRUCache, normalize_text
+
+Messages = List[Dict[str, str]]
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _normalized(messages: Messages) -> List[Tuple[str, str]]:
+    return [(m.get("role", ""), normalize_text(m.get("content", ""))) for m in messages]
+
+
+def conversation_key(provider: str, model: str, messages: Messages) -> str:
+    """Digest of the normalized messages, namespaced by provider and model"""
+    return _digest([f"{provider}:{model}", _normalized(messages)])
+
+
+class _SemanticBucket:
+    def __init__(self, dim: int, capacity: int):
+        """Embeddings of the last user messages seen after one conversation prefix"""
+        self.capacity = capacity
+        # (keys, matrix) with row i embedding keys[i]; add() swaps in a new pair
+        # so lock-free readers never pair a score with the wrong key
+        self.entries: Tuple[Tuple[str, ...], np.ndarray] = ((), np.empty((0, dim), dtype=np.float32))
+
+    def add(self, key: str, vector: np.ndarray):
+        """Called with the cache lock held"""
+        keys, matrix = self.entries
+        if key in keys:
+            return
+        keys = keys + (key,)
+        matrix = np.vstack([matrix, vector[None, :]])
+        if len(keys) > self.capacity:
+            keys, matrix = keys[1:], matrix[1:]
+        self.entries = (keys, matrix)
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        keys, matrix = self.entries
+        if not keys:
+            return None, 0.0
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return keys[best], float(scores[best])
+
+
+class CompletionCache:
+    def __init__(self,
+                 max_entries: int = 2048,
+                 ttl: Optional[float] = 3600.0,
+                 semantic_threshold: float = 0.92,
+                 max_prefixes: int = 512,
+                 prefix_capacity: int = 64,
+                 encoder: Optional[Callable[[], Optional[Callable[[str], np.ndarray]]]] = None):
+        """
+        encoder returns the current text encoder, or None while none is available
+        (the semantic tier is then skipped and only exact matches are served).
+        """
+        self.semantic_threshold = semantic_threshold
+        self.prefix_capacity = prefix_capacity
+        self.encoder = encoder
+        # exact key -> (completion text, total tokens the upstream spent on it)
+        self._exact = LRUCache(max_entries=max_entries, ttl=ttl)
+        # (namespace, prefix key) -> _SemanticBucket
+        self._semantic = LRUCache(max_entries=max_prefixes)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.tokens_saved = 0
+
+    def _keys(self, provider: str, model: str, messages: Messages) -> Tuple[str, Tuple[str, str, str], str]:
+        """(exact key, semantic bucket key, normalized last user message)"""
+        normalized = _normalized(messages)
+        namespace = f"{provider}:{model}"
+        exact = _digest([namespace, normalized])
+        return exact, (namespace, "prefix", _digest(normalized[:-1])), normalized[-1][1]
+
+    def _encode(self, text: str) -> Optional[np.ndarray]:
+        encode = self.encoder() if self.encoder else None
+        if encode is None:
+            return None
+        vector = np.asarray(encode(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    @staticmethod
+    def _cacheable(messages: Messages) -> bool:
+        return bool(messages) and messages[-1].get("role") == "user"
+
+    def lookup(self, provider: str, model: str, messages: Messages) -> Optional[str]:
+        """Cached completion for this conversation, or None"""
+        if not self._cacheable(messages):
+            return None
+        exact, prefix, last = self._keys(provider, model, messages)
+
+        entry = self._exact.get(exact)
+        if entry is not None:
+            with self._lock:
+                self.exact_hits += 1
+                self.tokens_saved += entry[1]
+            return entry[0]
+
+        bucket = self._semantic.get(prefix)
+        if bucket is not None:
+            vector = self._encode(last)
+            if vector is not None:
+                key, score = bucket.nearest(vector)
+                entry = self._exact.get(key) if key and score >= self.semantic_threshold else None
+                if entry is not None:
+                    with self._lock:
+                        self.semantic_hits += 1
+                        self.tokens_saved += entry[1]
+                    return entry[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, provider: str, model: str, messages: Messages, completion: str, tokens: int = 0):
+        """Remember the completion generated for this conversation"""
+        if not completion or not self._cacheable(messages):
+            return
+        exact, prefix, last = self._keys(provider, model, messages)
+        self._exact.set(exact, (completion, int(tokens or 0)))
+        with self._lock:
+            self.stores += 1
+
+        vector = self._encode(last)
+        if vector is not None:
+            with self._lock:
+                bucket = self._semantic.get(prefix)
+                if bucket is None:
+                    bucket = _SemanticBucket(len(vector), self.prefix_capacity)
+                    self._semantic.set(prefix, bucket)
+                bucket.add(exact, vector)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._exact),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "evictions": self._exact.evictions,
+            "expirations": self._exact.expirations,
+        }
+
+    def clear(self):
+        self._exact.clear()
+        self._semantic.clear()
+
+
+def _rag_encoder() -> Optional[Callable[[str], np.ndarray]]:
+    """The warmed-up RAG pipeline's cached query encoder, if it is ready"""
+    from .startup import rag_warmup
+
+    warmup = rag_warmup()
+    return warmup.get().encode_query if warmup.ready else None
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """Process-wide completion cache (None when ASHA_COMPLETION_CACHE=0)"""
+    global _cache
+    if os.getenv("ASHA_COMPLETION_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            ttl = float(os.getenv("ASHA_COMPLETION_CACHE_TTL", "3600"))
+            _cache = CompletionCache(
+                max_entries=int(os.getenv("ASHA_COMPLETION_CACHE_SIZE", "2048")),
+                ttl=ttl if ttl > 0 else None,
+                semantic_threshold=float(os.getenv("ASHA_SEMANTIC_CACHE_THRESHOLD", "0.92")),
+                encoder=_rag_encoder
+            )
+        return _cache
@@ -1,30 +1,25 @@
 # src/context_manager.py
+from src.session_store import make_session_store
+
+
 class ContextManager:
-    def __init__(self, context_window=5):
+    def __init__(self, context_window=5, store=None):
         self.context_window = context_window
-        self.conversations = {}
+        # Bounded, expiring history; ASHA_SESSION_STORE=sqlite shares it across worker processes
+        self.conversations = store or make_session_store(namespace="context_manager")
     
     def add_interaction(self, session_id, user_query, bot_response):
         """Add a new interaction to the conversation history"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        
-        self.conversations[session_id].append({
+        # Only the last context_window interactions are kept
+        self.conversations.append(session_id, {
             "user": user_query,
             "bot": bot_response
-        })
-        
-        # Maintain context window size
-        if len(self.conversations[session_id]) > self.context_window:
-            self.conversations[session_id] = self.conversations[session_id][-self.context_window:]
+        }, max_messages=self.context_window)
     
     def get_context(self, session_id):
         """Get current conversation context"""
-        if session_id in self.conversations:
-            return self.conversations[session_id]
-        return []
+        return self.conversations.get(session_id)
     
     def clear_context(self, session_id):
         """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
\ No newline at end of file
+        self.conversations.delete(session_id)
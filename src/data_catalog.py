@@ -0,0 +1,290 @@
+"""
+Change-aware catalog of the local data files.
+
+Each source file is parsed once and kept in memory. On access the file's mtime
+and size are compared with the last load (at most once per check interval), and
+only when they differ is the file re-read and diffed against the previous rows
+by stable id. Listeners are told which ids were added, changed or removed so the
+RAG pipeline can re-embed just those rows.
+
+Equality filters are answered from per-field inverted indexes (normalized value
+-> sorted row positions) built lazily once per data version, so a multi-key
+filter costs a few set intersections instead of a pass over every row.
+
+Job listings are held column-wise in a `JobCatalog` (NumPy columns, with
+company, location and industry stored as pandas categoricals) together with
+their precomputed search descriptions; a row only becomes a dict when a caller
+indexes into the catalog.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CatalogDiff:
+    """Row ids that differ between two versions of a source"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class JobCatalog:
+    """Column-oriented job listings; rows are materialized into dicts on access"""
+
+    ID_FIELD = "job_id"
+    CATEGORICAL_FIELDS = ("company", "location", "industry")
+    REQUIRED_FIELDS = ("job_title", "company", "location", "industry")
+
+    def __init__(self, frame: pd.DataFrame):
+        self.fields = list(frame.columns)
+        self.columns: Dict[str, Any] = {}
+        for name in self.fields:
+            if name in self.CATEGORICAL_FIELDS:
+                self.columns[name] = pd.Categorical(frame[name])
+            else:
+                self.columns[name] = frame[name].to_numpy()
+        self._length = len(frame)
+
+        if self.ID_FIELD in frame:
+            self._ids = frame[self.ID_FIELD].astype(str).tolist()
+        else:
+            self._ids = [str(i) for i in range(self._length)]
+
+        # A row is searchable only if every field used in its description is present
+        if all(name in frame for name in self.REQUIRED_FIELDS):
+            valid = np.ones(self._length, dtype=bool)
+            for name in self.REQUIRED_FIELDS:
+                valid &= (frame[name].notna() & (frame[name].astype(str) != "")).to_numpy()
+            described = frame.loc[valid, list(self.REQUIRED_FIELDS)].astype(str)
+            self.descriptions: List[str] = (
+                described["job_title"] + " at " + described["company"] + " in " +
+                described["location"] + " (" + described["industry"] + ")"
+            ).tolist()
+        else:
+            valid = np.zeros(self._length, dtype=bool)
+            self.descriptions = []
+        self.valid_positions = np.flatnonzero(valid)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "JobCatalog":
+        return cls(pd.read_csv(path))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        position = int(position)
+        row = {}
+        for name in self.fields:
+            value = self.columns[name][position]
+            row[name] = value.item() if isinstance(value, np.generic) else value
+        return row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(self._length):
+            yield self[position]
+
+    def ids(self) -> List[str]:
+        """Stable row ids (job_id as a string, or the position if absent)"""
+        return self._ids
+
+    def signatures(self) -> List[tuple]:
+        """One tuple of column values per row, used to detect changed rows"""
+        return list(zip(*(list(self.columns[name]) for name in self.fields)))
+
+    def factorize(self, field_name: str) -> Tuple[np.ndarray, List[Any]]:
+        """Integer code per row and the distinct values of a field"""
+        if field_name not in self.columns:
+            return np.zeros(self._length, dtype=np.int64), ['']
+        codes, uniques = pd.factorize(np.asarray(self.columns[field_name], dtype=object), use_na_sentinel=False)
+        return codes, list(uniques)
+
+
+def _load_jobs(path: Path) -> JobCatalog:
+    return JobCatalog.from_csv(path)
+
+
+def _load_json(path: Path) -> List[Dict[str, Any]]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def normalize_value(value: Any) -> str:
+    """Normalized form used for filter matching (case-insensitive string equality)"""
+    return str(value).lower()
+
+
+class InvertedIndex:
+    def __init__(self, rows: Sequence[Dict[str, Any]], field_name: str):
+        """Map each normalized value of field_name to the sorted positions holding it"""
+        if isinstance(rows, JobCatalog):
+            codes, uniques = rows.factorize(field_name)
+        else:
+            # Normalized strings, like the baseline filter: dict and list fields
+            # (mentor, tags) are unhashable as raw values
+            values = np.empty(len(rows), dtype=object)
+            values[:] = [normalize_value(item.get(field_name, '')) for item in rows]
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        grouped: Dict[str, List[np.ndarray]] = {}
+        for code, value in enumerate(uniques):
+            grouped.setdefault(normalize_value(value), []).append(order[bounds[code]:bounds[code + 1]])
+
+        self.field = field_name
+        self.postings = {
+            value: parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+            for value, parts in grouped.items()
+        }
+
+    def lookup(self, value: Any) -> np.ndarray:
+        return self.postings.get(normalize_value(value), np.empty(0, dtype=np.int64))
+
+
+class CatalogSource:
+    def __init__(self,
+                 name: str,
+                 path: Path,
+                 id_field: str,
+                 loader: Callable[[Path], Sequence[Dict[str, Any]]]):
+        """Track one data file and the rows parsed from it"""
+        self.name = name
+        self.path = path
+        self.id_field = id_field
+        self.loader = loader
+        self.version = 0
+        self.rows: Sequence[Dict[str, Any]] = []
+        self._signature: Optional[Tuple[int, int]] = None
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        # Rows and the field indexes built over them, swapped together on reload
+        self._indexed: Tuple[Sequence[Dict[str, Any]], Dict[str, InvertedIndex]] = (self.rows, {})
+
+    def row_id(self, item: Dict[str, Any], position: int) -> str:
+        """Stable id of a row, falling back to its position in the file"""
+        return str(item.get(self.id_field, position))
+
+    def _row_keys(self, rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Row id -> comparable row content"""
+        if isinstance(rows, JobCatalog):
+            return dict(zip(rows.ids(), rows.signatures()))
+        return {self.row_id(item, i): item for i, item in enumerate(rows)}
+
+    def refresh(self) -> Optional[CatalogDiff]:
+        """Reload the file if it changed on disk; returns the diff or None"""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        if signature == self._signature:
+            return None
+
+        rows = self.loader(self.path) if signature else []
+        by_id = self._row_keys(rows)
+
+        diff = CatalogDiff()
+        for row_id, item in by_id.items():
+            previous = self._by_id.get(row_id)
+            if previous is None:
+                diff.added.append(row_id)
+            elif previous != item:
+                diff.changed.append(row_id)
+        diff.removed = [row_id for row_id in self._by_id if row_id not in by_id]
+
+        self._indexed = (rows, {})
+        self.rows = rows
+        self._by_id = by_id
+        self._signature = signature
+        self.version += 1
+        return diff
+
+    def field_index(self, field_name: str, rows: Sequence[Dict[str, Any]]) -> InvertedIndex:
+        """Inverted index for a field of rows, cached for the current version"""
+        indexed_rows, indexes = self._indexed
+        if indexed_rows is not rows:
+            # Caller holds rows from before a reload; index them without caching
+            return InvertedIndex(rows, field_name)
+        index = indexes.get(field_name)
+        if index is None:
+            index = InvertedIndex(rows, field_name)
+            indexes[field_name] = index
+        return index
+
+    def match(self, filters: Dict[str, Any], rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Sorted positions in rows whose fields equal every filter value"""
+        postings = sorted((self.field_index(key, rows).lookup(value) for key, value in filters.items()), key=len)
+        result = postings[0]
+        for other in postings[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
+
+
+class DataCatalog:
+    def __init__(self, data_path: Path, check_interval: float = 1.0):
+        """Catalog of the job, session and mentorship files under data_path"""
+        self.data_path = Path(data_path)
+        self.check_interval = check_interval
+        self.sources = {
+            "jobs": CatalogSource("jobs", self.data_path / "job_listing_data.csv", "job_id", _load_jobs),
+            "sessions": CatalogSource("sessions", self.data_path / "session_details.json", "session_id", _load_json),
+            "mentorship": CatalogSource("mentorship", self.data_path / "mentorship_programs.json", "program_id", _load_json),
+        }
+        self._listeners: List[Callable[[str, Sequence[Dict[str, Any]], CatalogDiff], None]] = []
+        self._last_checked: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def subscribe(self, listener: Callable[[str, Sequence[Dict[str, Any]], CatalogDiff], None]):
+        """Register a callback invoked as listener(source, rows, diff) after each reload"""
+        self._listeners.append(listener)
+
+    def version(self, name: str) -> int:
+        """Number of times the source has been (re)loaded"""
+        return self.sources[name].version
+
+    def match(self,
+              name: str,
+              filters: Dict[str, Any],
+              rows: Optional[Sequence[Dict[str, Any]]] = None) -> np.ndarray:
+        """Positions in rows (default: the current rows of name) matching all filters"""
+        if rows is None:
+            rows = self.rows(name)
+        return self.sources[name].match(filters, rows)
+
+    def rows(self, name: str) -> Sequence[Dict[str, Any]]:
+        """Current rows of a source, re-read from disk only when the file changed"""
+        source = self.sources[name]
+        now = time.monotonic()
+        if source.version and now - self._last_checked.get(name, 0.0) < self.check_interval:
+            return source.rows
+
+        with self._lock:
+            self._last_checked[name] = now
+            diff = source.refresh()
+            if diff:
+                logger.info(f"Catalog '{name}' v{source.version}: {len(diff.added)} added, "
+                            f"{len(diff.changed)} changed, {len(diff.removed)} removed")
+                for listener in self._listeners:
+                    try:
+                        listener(name, source.rows, diff)
+                    except Exception as e:
+                        logger.error(f"Catalog listener failed for '{name}': {e}")
+        return source.rows
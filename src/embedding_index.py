@@ -0,0 +1,334 @@
+"""
+On-disk embedding index for the RAG pipeline.
+
+Each data source (jobs, sessions, mentorship) gets its own pair of files in the
+index directory: a raw float32 matrix that is memory-mapped on load, and a JSON
+sidecar that maps every matrix row to the source row id and the content hash of
+the description it was embedded from. Rows are looked up by content hash, so a
+description is only ever encoded once, across queries and across restarts.
+
+When a source changes, `sync` embeds only the new descriptions and tombstones
+rows whose content no longer appears in the source. Tombstoned rows stay in the
+matrix until they make up more than `compact_ratio` of it, at which point the
+live rows are rewritten to a fresh file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DTYPE = np.float32
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a description, used as the index key for its embedding"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingIndex:
+    def __init__(self, name: str, index_dir: os.PathLike, model_name: str, compact_ratio: float = 0.5):
+        """Open (or lazily create) the index for one data source"""
+        self.name = name
+        self.model_name = model_name
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self.index_dir = Path(index_dir)
+        self.matrix_path = self.index_dir / f"{name}.f32"
+        self.sidecar_path = self.index_dir / f"{name}.rows.json"
+        self.lock_path = self.index_dir / f"{name}.lock"
+        self._reset()
+        self._load()
+        if self.hashes:
+            logger.info(f"Opened embedding index '{name}' with {len(self.hashes)} rows")
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def _reset(self):
+        self.dim: Optional[int] = None
+        self.row_ids: List[Any] = []
+        self.hashes: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self.tombstones: Set[int] = set()
+        self._matrix: Optional[np.ndarray] = None
+        self._persistent = True
+
+    def _load(self):
+        """Map the matrix and read the sidecar; never calls the encoder"""
+        self._reset()
+        if not self.sidecar_path.exists() or not self.matrix_path.exists():
+            return
+        try:
+            with open(self.sidecar_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_name:
+                logger.info(f"Index '{self.name}' was built with {meta.get('model')}, rebuilding for {self.model_name}")
+                return
+
+            rows = meta["rows"]
+            dim = meta["dim"]
+            if rows and self.matrix_path.stat().st_size < len(rows) * dim * DTYPE().itemsize:
+                logger.warning(f"Index '{self.name}' matrix is shorter than its sidecar, rebuilding")
+                return
+
+            self.dim = dim
+            self.row_ids = [row_id for row_id, _ in rows]
+            self.hashes = [row_hash for _, row_hash in rows]
+            self._positions = {row_hash: i for i, row_hash in enumerate(self.hashes)}
+            self.tombstones = set(meta.get("tombstones", []))
+            self._remap()
+            logger.debug(f"Loaded embedding index '{self.name}' with {len(rows)} rows")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load embedding index '{self.name}': {e}")
+            self._reset()
+
+    def _remap(self):
+        if not self.hashes:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(self.matrix_path, dtype=DTYPE, mode="r", shape=(len(self.hashes), self.dim))
+
+    @contextmanager
+    def _locked(self):
+        """Serialize writers across processes sharing the index directory"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_sidecar(self):
+        tmp_path = self.sidecar_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "model": self.model_name,
+                "dim": self.dim,
+                "rows": [[row_id, row_hash] for row_id, row_hash in zip(self.row_ids, self.hashes)],
+                "tombstones": sorted(self.tombstones)
+            }, f)
+        os.replace(tmp_path, self.sidecar_path)
+
+    @property
+    def matrix(self) -> Optional[np.ndarray]:
+        """The full embedding matrix (memory-mapped when persisted), tombstones included"""
+        return self._matrix
+
+    def positions(self, hashes: Sequence[str]) -> List[Optional[int]]:
+        """Matrix row for each content hash, or None if it has not been embedded"""
+        return [self._positions.get(row_hash) for row_hash in hashes]
+
+    def vectors(self, positions: Sequence[int]) -> np.ndarray:
+        """Gather the embeddings stored at the given matrix rows"""
+        return np.asarray(self._matrix[list(positions)])
+
+    def add(self, row_ids: Sequence[Any], hashes: Sequence[str], embeddings: np.ndarray):
+        """Append new embeddings to the matrix and record them in the sidecar"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=DTYPE)
+        if embeddings.ndim != 2 or len(embeddings) != len(hashes):
+            raise ValueError(f"Expected {len(hashes)} embeddings, got array of shape {embeddings.shape}")
+        if self.dim is not None and embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match index dimension {self.dim}")
+
+        with self._lock:
+            if self._persistent:
+                try:
+                    self._append_to_disk(row_ids, hashes, embeddings)
+                    return
+                except OSError as e:
+                    logger.warning(f"Index directory not writable, keeping '{self.name}' in memory: {e}")
+                    self._persistent = False
+            self._append_in_memory(row_ids, hashes, embeddings)
+
+    def _append_to_disk(self, row_ids, hashes, embeddings):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            # Another worker may have appended since we loaded; pick up its rows first
+            self._load()
+            with self._open_for_append() as f:
+                added = self._write_new(f, row_ids, hashes, embeddings)
+            if added:
+                self._write_sidecar()
+                self._remap()
+
+    def _open_for_append(self):
+        """Open the matrix positioned just past the rows recorded in the sidecar"""
+        # Bytes beyond the sidecar (an interrupted write, or an index we refused to load) are dropped
+        end = len(self.hashes) * (self.dim or 0) * DTYPE().itemsize
+        f = open(self.matrix_path, "r+b" if self.matrix_path.exists() else "wb")
+        f.truncate(end)
+        f.seek(end)
+        return f
+
+    def _write_new(self, f, row_ids, hashes, embeddings) -> int:
+        """Write the rows whose hashes are not indexed yet; returns how many were written"""
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match index dimension {self.dim}")
+        seen = set()
+        new = []
+        for i, row_hash in enumerate(hashes):
+            if row_hash not in self._positions and row_hash not in seen:
+                seen.add(row_hash)
+                new.append(i)
+        if new:
+            f.write(embeddings[new].tobytes())
+            self._record(row_ids, hashes, new)
+        return len(new)
+
+    @contextmanager
+    def appender(self):
+        """
+        Hold the write lock for a bulk load, yielding append(row_ids, hashes, embeddings).
+
+        Matrix rows are streamed to disk as they arrive and the sidecar is
+        written once on exit, so a long ingestion does not rewrite it per batch.
+        """
+        with self._lock:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            with self._locked():
+                self._load()
+                f = self._open_for_append()
+
+                def append(row_ids: Sequence[Any], hashes: Sequence[str], embeddings: np.ndarray) -> int:
+                    return self._write_new(f, row_ids, hashes, np.ascontiguousarray(embeddings, dtype=DTYPE))
+
+                try:
+                    yield append
+                finally:
+                    f.close()
+                    self._write_sidecar()
+                    self._remap()
+
+    def _append_in_memory(self, row_ids, hashes, embeddings):
+        new = [i for i, row_hash in enumerate(hashes) if row_hash not in self._positions]
+        if not new:
+            return
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        existing = np.asarray(self._matrix) if self._matrix is not None else np.empty((0, self.dim), dtype=DTYPE)
+        self._matrix = np.vstack([existing, embeddings[new]])
+        self._record(row_ids, hashes, new)
+
+    def _record(self, row_ids, hashes, new):
+        for i in new:
+            self._positions[hashes[i]] = len(self.hashes)
+            self.row_ids.append(row_ids[i])
+            self.hashes.append(hashes[i])
+
+    def _ensure(self,
+                row_ids: Sequence[Any],
+                hashes: Sequence[str],
+                texts: Sequence[str],
+                encode: Callable[[List[str]], np.ndarray]) -> int:
+        """Encode and append the texts whose hashes are not indexed yet"""
+        missing = {}
+        for i, row_hash in enumerate(hashes):
+            if row_hash not in self._positions and row_hash not in missing:
+                missing[row_hash] = i
+
+        if missing:
+            order = list(missing.values())
+            logger.info(f"Embedding {len(order)} new rows for index '{self.name}'")
+            vectors = encode([texts[i] for i in order])
+            self.add([row_ids[i] for i in order], [hashes[i] for i in order], vectors)
+        return len(missing)
+
+    def embeddings_for(self,
+                       row_ids: Sequence[Any],
+                       texts: Sequence[str],
+                       encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return embeddings for texts, encoding only those not already indexed"""
+        return self.vectors(self.ensure(row_ids, texts, encode))
+
+    def ensure(self,
+               row_ids: Sequence[Any],
+               texts: Sequence[str],
+               encode: Callable[[List[str]], np.ndarray]) -> List[int]:
+        """Matrix row for each text, encoding and appending any that are missing"""
+        hashes = [content_hash(text) for text in texts]
+        with self._lock:
+            self._ensure(row_ids, hashes, texts, encode)
+            return self.positions(hashes)
+
+    def sync(self,
+             row_ids: Sequence[Any],
+             texts: Sequence[str],
+             encode: Callable[[List[str]], np.ndarray]) -> Dict[str, int]:
+        """Make the index match the current rows of its source"""
+        hashes = [content_hash(text) for text in texts]
+        with self._lock:
+            added = self._ensure(row_ids, hashes, texts, encode)
+            live = set(hashes)
+            if self._persistent:
+                try:
+                    with self._locked():
+                        self._load()
+                        self._set_tombstones(live)
+                        self._write_sidecar()
+                except OSError as e:
+                    logger.warning(f"Could not persist tombstones for '{self.name}': {e}")
+            else:
+                self._set_tombstones(live)
+
+            if self.hashes and len(self.tombstones) > self.compact_ratio * len(self.hashes):
+                self.compact()
+        return {"added": added, "tombstoned": len(self.tombstones), "rows": len(self.hashes)}
+
+    def _set_tombstones(self, live: Set[str]):
+        self.tombstones = {pos for row_hash, pos in self._positions.items() if row_hash not in live}
+
+    def compact(self):
+        """Rewrite the matrix without tombstoned rows"""
+        with self._lock:
+            if self._persistent:
+                try:
+                    with self._locked():
+                        self._load()
+                        self._drop_tombstones(write=True)
+                    return
+                except OSError as e:
+                    logger.warning(f"Could not compact index '{self.name}' on disk: {e}")
+                    self._persistent = False
+            self._drop_tombstones(write=False)
+
+    def _drop_tombstones(self, write: bool):
+        if not self.tombstones:
+            return
+        keep = [pos for pos in range(len(self.hashes)) if pos not in self.tombstones]
+        matrix = np.asarray(self._matrix[keep]) if keep else np.empty((0, self.dim), dtype=DTYPE)
+        logger.info(f"Compacting index '{self.name}': dropping {len(self.tombstones)} of {len(self.hashes)} rows")
+
+        self.row_ids = [self.row_ids[pos] for pos in keep]
+        self.hashes = [self.hashes[pos] for pos in keep]
+        self._positions = {row_hash: i for i, row_hash in enumerate(self.hashes)}
+        self.tombstones = set()
+
+        if not write:
+            self._matrix = matrix
+            return
+        # Write to a new file so other processes keep reading their old mapping
+        tmp_path = self.matrix_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(np.ascontiguousarray(matrix, dtype=DTYPE).tobytes())
+        os.replace(tmp_path, self.matrix_path)
+        self._write_sidecar()
+        self._remap()
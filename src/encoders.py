@@ -0,0 +1,225 @@
+"""
+Text encoder backends for the RAG pipeline.
+
+Every backend exposes the slice of the SentenceTransformer API the pipeline
+uses: `encode(texts, convert_to_numpy=True, batch_size=...)`, plus a `name`
+(stored in the embedding index so vectors from different backends are never
+mixed) and its output `dim`.
+
+- `sentence-transformers`: the reference model, as before.
+- `int8`: the same transformer with its Linear layers dynamically quantized to
+  int8 for CPU inference, loaded from local weights when they are present.
+- `hashing`: a deterministic feature-hashing encoder (word unigrams and bigrams,
+  sublinear TF, L2 normalized). It needs no model download, so CI and
+  benchmarks run offline and reproducibly.
+
+Compare load time, latency and memory with:
+    python -m src.encoders --compare sentence-transformers int8 hashing
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .startup import PROFILE, memory_usage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_WEIGHTS_DIR = Path(__file__).parent.parent / "data" / "models"
+
+_TOKEN = re.compile(r"\w+")
+
+
+class SentenceTransformerEncoder:
+    kind = "sentence-transformers"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        with PROFILE.phase("import sentence_transformers"):
+            from sentence_transformers import SentenceTransformer
+        with PROFILE.phase(f"load {model_name}"):
+            self.model = SentenceTransformer(model_name)
+        self.name = model_name
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Union[str, Sequence[str]], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=convert_to_numpy, batch_size=batch_size)
+
+
+class QuantizedEncoder:
+    kind = "int8"
+
+    def __init__(self,
+                 model_name: str = DEFAULT_MODEL,
+                 weights_dir: Optional[str] = None,
+                 max_length: int = 128,
+                 threads: Optional[int] = None):
+        """
+        Mean-pooled transformer with int8 dynamic quantization of its Linear layers.
+
+        Weights are read from weights_dir (default data/models/<model_name>, or
+        ASHA_ENCODER_WEIGHTS) when it exists, otherwise from the sentence-transformers
+        hub repository of the same name.
+        """
+        with PROFILE.phase("import torch, transformers"):
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+
+        local = Path(weights_dir or os.getenv("ASHA_ENCODER_WEIGHTS", DEFAULT_WEIGHTS_DIR / model_name))
+        source = str(local) if local.exists() else f"sentence-transformers/{model_name}"
+        if threads:
+            torch.set_num_threads(threads)
+
+        self._torch = torch
+        with PROFILE.phase(f"load and quantize {model_name}"):
+            self.tokenizer = AutoTokenizer.from_pretrained(source)
+            model = AutoModel.from_pretrained(source).eval()
+            self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.max_length = max_length
+        self.name = f"{model_name}@int8"
+        self.dim = model.config.hidden_size
+        logger.info(f"Loaded int8 encoder from {source}")
+
+    def encode(self, texts: Union[str, Sequence[str]], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        with self._torch.inference_mode():
+            for start in range(0, len(texts), max(batch_size, 1)):
+                batch = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                       max_length=self.max_length, return_tensors="pt")
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = self._torch.nn.functional.normalize(pooled, p=2, dim=1)
+                out[start:start + len(pooled)] = pooled.numpy()
+        return out[0] if single else out
+
+
+class HashingEncoder:
+    kind = "hashing"
+
+    def __init__(self, dim: int = 384, bigrams: bool = True):
+        """Signed feature hashing of word n-grams; identical output on every machine"""
+        self.dim = dim
+        self.bigrams = bigrams
+        self.name = f"hashing-{dim}{'-bigram' if bigrams else ''}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN.findall(text.lower())
+        if self.bigrams:
+            return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return words
+
+    def encode(self, texts: Union[str, Sequence[str]], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            for feature in self._features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, count in counts.items():
+                # crc32 rather than hash(), which is salted per process
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                out[row, h % self.dim] += sign * (1.0 + np.log(count))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        out /= norms
+        return out[0] if single else out
+
+
+ENCODERS = {
+    SentenceTransformerEncoder.kind: SentenceTransformerEncoder,
+    QuantizedEncoder.kind: QuantizedEncoder,
+    HashingEncoder.kind: HashingEncoder,
+}
+
+
+def make_encoder(spec: Union[None, str, Dict[str, Any]] = None, model_name: str = DEFAULT_MODEL):
+    """Build an encoder from a kind ("sentence-transformers", "int8", "hashing") or a dict with "type" plus parameters"""
+    if spec is None:
+        spec = os.getenv("ASHA_ENCODER", SentenceTransformerEncoder.kind)
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    params = dict(spec)
+    kind = params.pop("type", SentenceTransformerEncoder.kind)
+    if kind not in ENCODERS:
+        raise ValueError(f"Unknown encoder: {kind}")
+    if kind != HashingEncoder.kind:
+        params.setdefault("model_name", model_name)
+    return ENCODERS[kind](**params)
+
+
+def benchmark(spec: Union[str, Dict[str, Any]],
+              texts: Sequence[str],
+              model_name: str = DEFAULT_MODEL,
+              batch_size: int = 32) -> Dict[str, float]:
+    """Load time, single-query latency, batch throughput and RSS growth of one encoder"""
+    rss_before = memory_usage()["rss_mb"]
+    start = time.perf_counter()
+    encoder = make_encoder(spec, model_name)
+    load_s = time.perf_counter() - start
+    encoder.encode(list(texts[:batch_size]))  # warm-up
+
+    start = time.perf_counter()
+    for text in texts:
+        encoder.encode([text])
+    query_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+    start = time.perf_counter()
+    encoder.encode(list(texts), batch_size=batch_size)
+    batch_per_s = len(texts) / (time.perf_counter() - start)
+    return {
+        "load_s": load_s,
+        "query_ms": query_ms,
+        "texts_per_s": batch_per_s,
+        "rss_mb": memory_usage()["rss_mb"] - rss_before,
+        "dim": float(encoder.dim),
+    }
+
+
+def _benchmark_texts(n: int) -> List[str]:
+    """Job-style descriptions from the bundled data, repeated up to n texts"""
+    from .data_catalog import JobCatalog
+
+    path = Path(__file__).parent.parent / "data" / "job_listing_data.csv"
+    base = JobCatalog.from_csv(path).descriptions if path.exists() else []
+    base = base or ["Data Analyst at SheAnalytics in Pune (Technology)"]
+    return [f"{base[i % len(base)]} #{i}" for i in range(n)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare encoder backends on load time, latency and memory")
+    parser.add_argument("--compare", nargs="+", default=list(ENCODERS))
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(benchmark(args.single, _benchmark_texts(args.texts), args.model, args.batch_size)))
+        sys.exit(0)
+
+    # Each backend runs in a fresh interpreter so memory numbers do not overlap
+    for kind in args.compare:
+        cmd = [sys.executable, "-m", "src.encoders", "--single", kind, "--model", args.model,
+               "--texts", str(args.texts), "--batch-size", str(args.batch_size)]
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=Path(__file__).parent.parent)
+        if result.returncode != 0:
+            print(f"{kind:22s} failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'}")
+            continue
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{kind:22s} " + "  ".join(f"{key}={value:.2f}" for key, value in row.items()))
@@ -1,5 +1,22 @@
 # src/fallback_module.py
+import re
+
+
 class FallbackModule:
+    # Canned answers for common topics, matched by keyword in order
+    TEMPLATES = [
+        (("resume", "cv", "portfolio"),
+         "Creating a strong resume is crucial. Here are some key tips: 1) Tailor it to each job application, 2) Use action verbs, 3) Quantify achievements, 4) Keep formatting consistent, and 5) Have others review it."),
+        (("interview", "preparing"),
+         "Preparing for interviews is essential! Research the company, practice common questions, prepare concrete examples of your achievements, and develop thoughtful questions to ask."),
+        (("mentor", "mentorship"),
+         "Mentorship can make a big difference to your career. Look for programs that match your field and goals, and come to each conversation with specific questions."),
+        (("job", "career", "work", "position"),
+         "I'd be happy to help with your job search! Tell me more about your experience, skills, and the type of role you're looking for."),
+        (("hello", "hi", "hey", "greetings"),
+         "Hello! I'm Asha, your career assistant. How can I help with your professional journey today?"),
+    ]
+
     def __init__(self):
         self.generic_responses = [
             "I'm not sure I have enough information to answer that question. Could you provide more details?",
@@ -17,4 +34,47 @@ class FallbackModule:
     def should_fallback(self, confidence_score):
         """Determine if the system should use a fallback response"""
         # Simple threshold-based decision
-        return confidence_score < 0.4
\ No newline at end of file
+        return confidence_score < 0.4
+
+    def template_response(self, query):
+        """Canned answer for the first topic mentioned in the query, or None"""
+        words = set(re.findall(r"[a-z]+", query.lower()))
+        for keywords, message in self.TEMPLATES:
+            if words.intersection(keywords):
+                return message
+        return None
+
+    @staticmethod
+    def describe_match(source, item):
+        """One line describing a retrieved job, session or mentorship program"""
+        if source == "jobs":
+            return (f"{item.get('job_title')} at {item.get('company')} in {item.get('location')}"
+                    f" - apply at {item.get('apply_link')}")
+        if source == "sessions":
+            return f"{item.get('title')} on {item.get('datetime', '')[:10]} - register at {item.get('registration_link')}"
+        return f"{item.get('title')}: {item.get('description')}"
+
+    def local_response(self, query, retrieved_info=None):
+        """
+        Answer built without the LLM, from retrieve_information() results and the
+        templates, for when the upstream is unavailable.
+
+        Returns {"message", "source", "confidence"}.
+        """
+        template = self.template_response(query)
+        data = (retrieved_info or {}).get("data") or []
+        if isinstance(data, dict):
+            # Combined results (no source was a confident match) only stand in for a missing template
+            matches = [] if template else [(source, item) for source, items in data.items() for item in items]
+        else:
+            matches = [(retrieved_info.get("source"), item) for item in data]
+
+        if matches:
+            lines = "\n".join(f"- {self.describe_match(source, item)}" for source, item in matches[:3])
+            message = f"Here is what I found that may help:\n{lines}"
+            if template:
+                message = f"{template}\n\n{message}"
+            return {"message": message, "source": "local_rag", "confidence": 0.6}
+        if template:
+            return {"message": template, "source": "template", "confidence": 0.5}
+        return {"message": self.get_fallback_response(query), "source": "template", "confidence": 0.3}
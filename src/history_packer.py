@@ -0,0 +1,141 @@
+"""
+Token-budgeted conversation history for upstream LLM prompts.
+
+Forwarding the last N messages verbatim lets a few long turns blow up prompt
+size, and with it upstream latency and cost. `HistoryPacker.pack` keeps the
+newest messages that fit a token budget and folds everything older into a
+compact extractive summary appended to the system prompt ("Earlier in this
+conversation: ..."), itself capped at `summary_budget` tokens.
+
+Token counts and one-line summaries are computed once per message and cached by
+content, so each request only does new work for the messages added since the
+previous turn; the summary is reassembled from cached lines rather than
+recomputed. `count_tokens` is a fast approximation of BPE token counts; any
+callable (for example the length of a tiktoken encoding) can replace it.
+"""
+
+import math
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache import LRUCache
+
+Message = Dict[str, str]
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+# Role/formatting overhead of one chat message, as counted by OpenAI-style APIs
+MESSAGE_OVERHEAD = 4
+SUMMARY_HEADER = "\n\nEarlier in this conversation:"
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count: words and punctuation, or ~4 characters per token for long words"""
+    return max(len(_PIECE.findall(text)), math.ceil(len(text) / 4))
+
+
+def summarize_message(message: Message, max_words: int = 24) -> str:
+    """One line for the summary: speaker plus the message's first sentence, clipped to max_words"""
+    content = " ".join(message.get("content", "").split())
+    first = _SENTENCE_END.split(content, maxsplit=1)[0]
+    words = first.split()
+    if len(words) > max_words:
+        first = " ".join(words[:max_words]) + " ..."
+    speaker = "User" if message.get("role") == "user" else "Asha"
+    return f"- {speaker}: {first}"
+
+
+class HistoryPacker:
+    def __init__(self,
+                 budget: int = 1500,
+                 summary_budget: int = 300,
+                 summary_words: int = 24,
+                 tokenizer: Callable[[str], int] = count_tokens,
+                 cache_size: int = 8192):
+        """
+        budget caps the tokens of the packed prompt (system prompt, summary and
+        recent messages); the newest message is always kept whole.
+        """
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.summary_words = summary_words
+        self.tokenizer = tokenizer
+        # (role, content) -> (message tokens, summary line, summary line tokens)
+        self._messages = LRUCache(max_entries=cache_size)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.summarized_messages = 0
+        self.tokens_saved = 0
+
+    def _measure(self, message: Message) -> Tuple[int, str, int]:
+        key = (message.get("role", ""), message.get("content", ""))
+        entry = self._messages.get(key)
+        if entry is None:
+            line = summarize_message(message, self.summary_words)
+            entry = (self.tokenizer(key[1]) + MESSAGE_OVERHEAD, line, self.tokenizer(line) + 1)
+            self._messages.set(key, entry)
+        return entry
+
+    def _summary(self, older: List[Message], budget: int) -> Tuple[str, int]:
+        """Summary of the older messages and its tokens; the newest lines are kept when they do not all fit"""
+        lines: List[str] = []
+        used = self.tokenizer(SUMMARY_HEADER)
+        for message in reversed(older):
+            _, line, tokens = self._measure(message)
+            if used + tokens > budget:
+                break
+            lines.append(line)
+            used += tokens
+        if not lines:
+            return "", 0
+        return SUMMARY_HEADER + "\n" + "\n".join(reversed(lines)), used
+
+    def pack(self, system_prompt: str, history: List[Message]) -> List[Message]:
+        """System message (with a summary of older turns) followed by the recent messages that fit"""
+        remaining = self.budget - self.tokenizer(system_prompt) - MESSAGE_OVERHEAD
+        measured = [self._measure(message)[0] for message in history]
+
+        # Newest messages first, holding back room for the summary when something is left out
+        start = len(history)
+        used = 0
+        for i in range(len(history) - 1, -1, -1):
+            reserve = self.summary_budget if i > 0 else 0
+            if start < len(history) and used + measured[i] + reserve > remaining:
+                break
+            used += measured[i]
+            start = i
+
+        summary, summary_tokens = "", 0
+        if start:
+            summary, summary_tokens = self._summary(history[:start], min(self.summary_budget, remaining - used))
+        with self._lock:
+            self.requests += 1
+            self.summarized_messages += start
+            self.tokens_saved += max(0, sum(measured[:start]) - summary_tokens)
+        return [{"role": "system", "content": system_prompt + summary}] + list(history[start:])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "summarized_messages": self.summarized_messages,
+            "tokens_saved": self.tokens_saved,
+            "cached_messages": len(self._messages),
+        }
+
+
+_packer: Optional[HistoryPacker] = None
+_packer_lock = threading.Lock()
+
+
+def get_history_packer() -> HistoryPacker:
+    """Process-wide packer; budgets come from ASHA_HISTORY_TOKENS and ASHA_SUMMARY_TOKENS"""
+    global _packer
+    with _packer_lock:
+        if _packer is None:
+            _packer = HistoryPacker(
+                budget=int(os.getenv("ASHA_HISTORY_TOKENS", "1500")),
+                summary_budget=int(os.getenv("ASHA_SUMMARY_TOKENS", "300"))
+            )
+        return _packer
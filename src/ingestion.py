@@ -0,0 +1,113 @@
+"""
+Streaming ingestion of large job feeds into the on-disk embedding index.
+
+The feed is read in bounded chunks and pushed through a generator pipeline:
+each chunk is validated and described column-wise (via JobCatalog), regrouped
+into fixed-size encode batches, and only rows whose description is not already
+indexed are embedded and appended to the memory-mapped matrix. Memory use is
+bounded by the chunk and batch sizes rather than by the size of the feed; the
+only per-row state kept is the index's id/hash sidecar.
+
+Usage:
+    python -m src.ingestion path/to/jobs.csv --index-dir data/index
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data_catalog import JobCatalog
+from .embedding_index import EmbeddingIndex, content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def read_chunks(path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Read a CSV feed chunksize rows at a time"""
+    yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def describe_chunks(chunks: Iterable[pd.DataFrame], stats: Dict[str, int]) -> Iterator[Tuple[List[str], List[str]]]:
+    """Valid row ids and their search descriptions for each chunk"""
+    for chunk in chunks:
+        jobs = JobCatalog(chunk)
+        ids = jobs.ids()
+        stats["rows"] += len(jobs)
+        stats["invalid"] += len(jobs) - len(jobs.valid_positions)
+        yield [ids[i] for i in jobs.valid_positions], jobs.descriptions
+
+
+def rebatch(pairs: Iterable[Tuple[List[str], List[str]]], batch_size: int) -> Iterator[Tuple[List[str], List[str]]]:
+    """Regroup (ids, texts) pairs of any size into batches of batch_size"""
+    ids: List[str] = []
+    texts: List[str] = []
+    for chunk_ids, chunk_texts in pairs:
+        ids.extend(chunk_ids)
+        texts.extend(chunk_texts)
+        while len(texts) >= batch_size:
+            yield ids[:batch_size], texts[:batch_size]
+            del ids[:batch_size], texts[:batch_size]
+    if texts:
+        yield ids, texts
+
+
+def ingest_job_feed(path: Path,
+                    index: EmbeddingIndex,
+                    encode: Callable[[List[str]], np.ndarray],
+                    chunksize: int = 10000,
+                    batch_size: int = 256) -> Dict[str, int]:
+    """Stream a job feed into index, embedding only rows it does not already hold"""
+    stats = {"rows": 0, "invalid": 0, "embedded": 0, "already_indexed": 0}
+    batches = rebatch(describe_chunks(read_chunks(path, chunksize), stats), batch_size)
+
+    with index.appender() as append:
+        for ids, texts in batches:
+            hashes = [content_hash(text) for text in texts]
+            todo = [i for i, position in enumerate(index.positions(hashes)) if position is None]
+            stats["already_indexed"] += len(texts) - len(todo)
+            if not todo:
+                continue
+            vectors = encode([texts[i] for i in todo])
+            stats["embedded"] += append([ids[i] for i in todo], [hashes[i] for i in todo], vectors)
+
+    logger.info(f"Ingested {path}: {stats}")
+    return stats
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux reports KB; 0 where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == "__main__":
+    from .encoders import make_encoder
+
+    parser = argparse.ArgumentParser(description="Stream a job feed CSV into the jobs embedding index")
+    parser.add_argument("feed", type=Path)
+    parser.add_argument("--index-dir", type=Path, default=Path(__file__).parent.parent / "data" / "index")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--encoder", default=None, help="sentence-transformers, int8 or hashing (default: ASHA_ENCODER)")
+    parser.add_argument("--chunksize", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    model = make_encoder(args.encoder, args.model)
+    start = time.perf_counter()
+    result = ingest_job_feed(
+        args.feed,
+        EmbeddingIndex("jobs", args.index_dir, model.name),
+        lambda texts: model.encode(texts, convert_to_numpy=True, batch_size=args.batch_size),
+        chunksize=args.chunksize,
+        batch_size=args.batch_size
+    )
+    print(f"{result} in {time.perf_counter() - start:.1f}s, peak RSS {peak_rss_mb():.0f} MB")
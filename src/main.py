@@ -18,24 +18,37 @@ os.environ["TRANSFORMERS_NO_ADVISORY_WARNINGS"] = "1"
 
 # Standard imports
 import uuid
-from src.rag_pipeline import RAGPipeline  # Correct path to rag_pipeline
+from src.startup import rag_warmup  # RAGPipeline (torch, sentence-transformers) is imported in the background
 from src.context_manager import ContextManager  # Correct path to context_manager
 from src.bias_detection import BiasDetectionModule  # Correct path to bias_detection
+from src.metrics import span, timed  # Per-stage latency histograms served at /metrics
 
 class AshaAIBot:
     def __init__(self):
-        # Initialize the pipeline, context manager, and bias detection module
-        self.rag_pipeline = RAGPipeline()
+        # Start loading the pipeline in the background; context manager and bias detection are cheap
+        self._rag = rag_warmup().start()
         self.context_manager = ContextManager()  # Instantiate the ContextManager
         self.bias_detector = BiasDetectionModule()
+
+    @property
+    def ready(self):
+        """True once the RAG pipeline has finished warming up"""
+        return self._rag.ready
+
+    @property
+    def rag_pipeline(self):
+        """The shared RAG pipeline, waiting for the warm-up if it is still running"""
+        return self._rag.get()
         
+    @timed("process_query")
     def process_query(self, query, session_id=None):
         """Process user query and generate response."""
         if not session_id:
             session_id = str(uuid.uuid4())  # Generate a new session ID if none is provided
             
         # Check for bias
-        is_biased, biased_term = self.bias_detector.detect_bias(query)
+        with span("bias_check"):
+            is_biased, biased_term = self.bias_detector.detect_bias(query)
         if is_biased:
             alternative = self.bias_detector.suggest_alternative(biased_term)
             response = {
@@ -47,13 +60,16 @@ class AshaAIBot:
             return response
         
         # Get conversation context from the ContextManager
-        context = self.context_manager.get_context(session_id)
+        with span("context_lookup"):
+            context = self.context_manager.get_context(session_id)
         
         # Retrieve information using the RAG pipeline
-        retrieved_info = self.rag_pipeline.retrieve_information(query)
+        with span("retrieval"):
+            retrieved_info = self.rag_pipeline.retrieve_information(query)
         
         # Generate response based on the retrieved information
-        response = self.generate_response(query, retrieved_info, context)
+        with span("response_build"):
+            response = self.generate_response(query, retrieved_info, context)
         
         # Update the context with the new query and response
         self.context_manager.add_interaction(session_id, query, response)
@@ -0,0 +1,252 @@
+"""
+Per-stage latency histograms and counters in Prometheus text format.
+
+Where a request spends its time (bias check, data load, description build,
+query encode, similarity scoring, history assembly, upstream LLM call) used to
+be visible only through scattered log lines. Code marks a stage with
+`span(stage)` (a context manager) or `@timed(stage)`; each records its duration
+in the `asha_stage_seconds` histogram and counts exceptions in
+`asha_stage_errors_total`. Other counters are incremented directly.
+
+Recording is cheap: a bucket bisect and two additions under an uncontended
+lock, with nothing formatted until `/metrics` is scraped and `REGISTRY.render()`
+runs. Values that other components already count (cache hits, breaker state,
+queue depth) are not counted twice: collectors added with `REGISTRY.collector()`
+read them at scrape time. ASHA_METRICS=0 turns spans into no-ops.
+
+Metrics are per process: with several gunicorn workers, each scrape reports the
+worker that answered it.
+"""
+
+import asyncio
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+ENABLED = os.getenv("ASHA_METRICS", "1") != "0"
+
+# Seconds; spans cover sub-millisecond lookups up to upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (labels, value) pairs of one metric, as produced by collectors
+Samples = Iterable[Tuple[Dict[str, Any], float]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric"):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, Samples]]]):
+        """
+        Add a function called at scrape time that yields (name, type, help,
+        samples) for values counted elsewhere; type is "counter" or "gauge".
+        """
+        with self._lock:
+            self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collect in collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    @abstractmethod
+    def _child(self):
+        """A new series of this metric"""
+
+    def labels(self, *values: Any):
+        """The series for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.copy().items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    @abstractmethod
+    def _render_child(self, values: Tuple[str, ...], child: Any) -> List[str]:
+        """Exposition lines of one series"""
+
+
+class _CounterChild:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self.lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _child(self):
+        return _CounterChild()
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One count per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values, child):
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("asha_stage_seconds", "Time spent in each request stage", ("stage",))
+STAGE_ERRORS = Counter("asha_stage_errors_total", "Stages that ended with an exception", ("stage",))
+
+
+class Span:
+    """Times one stage: use as `with span("query_encode"):`"""
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.labels(self.stage).observe(time.perf_counter() - self._start)
+        if exc_type is not None:
+            STAGE_ERRORS.labels(self.stage).inc()
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage: str):
+    """Context manager recording the duration (and any exception) of a stage"""
+    return Span(stage) if ENABLED else _NO_SPAN
+
+
+def timed(stage: str):
+    """Decorator recording each call of the function (or coroutine function) as a stage"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with Span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,90 @@
+"""
+Query routing for the RAG pipeline.
+
+Keyword signals are matched in a single pass of one precompiled regex (an
+alternation of every source's terms with word boundaries, so "work" no longer
+matches inside "network" or "workshop"). Queries without a keyword fall back to
+nearest-centroid classification: the query embedding is compared with the mean
+embedding of each source's corpus. Either way the router returns every source
+ranked by confidence, and the pipeline searches only the top one.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SOURCE_KEYWORDS: Dict[str, Sequence[str]] = {
+    "jobs": ["job", "career", "position", "work", "employment", "hiring", "vacancy", "vacancies"],
+    "sessions": ["session", "workshop", "training", "event", "webinar"],
+    "mentorship": ["mentor", "guidance", "program", "programme", "coaching", "advice"],
+}
+
+# Plural and common derived forms accepted after a keyword ("jobs", "mentorship", "working")
+_SUFFIX = r"(?:s|es|ship|ships|ing)?"
+
+
+class QueryRouter:
+    def __init__(self,
+                 keywords: Optional[Dict[str, Sequence[str]]] = None,
+                 temperature: float = 0.05):
+        """
+        Compile the keyword pattern once; temperature sharpens the softmax over
+        centroid similarities into confidences.
+        """
+        self.keywords = dict(keywords or SOURCE_KEYWORDS)
+        self.sources = list(self.keywords)
+        self.temperature = temperature
+        self._groups = {f"s{i}": source for i, source in enumerate(self.sources)}
+        alternatives = "|".join(
+            f"(?P<s{i}>{'|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))})"
+            for i, terms in enumerate(self.keywords.values())
+        )
+        self._pattern = re.compile(rf"\b(?:{alternatives}){_SUFFIX}\b", re.IGNORECASE)
+        self.centroid_sources: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    def fit_centroids(self, centroids: Dict[str, np.ndarray]) -> "QueryRouter":
+        """Use the (unit-normalized) mean embedding of each source as its centroid"""
+        self.centroid_sources = [source for source, vector in centroids.items() if vector is not None]
+        if not self.centroid_sources:
+            self.centroids = None
+            return self
+        matrix = np.vstack([centroids[source] for source in self.centroid_sources]).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids = matrix / norms
+        return self
+
+    def keyword_scores(self, query: str) -> Dict[str, int]:
+        """Keyword hits per source from one scan of the query"""
+        counts = dict.fromkeys(self.sources, 0)
+        for match in self._pattern.finditer(query):
+            counts[self._groups[match.lastgroup]] += 1
+        return counts
+
+    def route(self,
+              query: str,
+              embed: Optional[Callable[[str], np.ndarray]] = None) -> List[Tuple[str, float]]:
+        """
+        Sources ranked by confidence (summing to 1).
+
+        Keyword hits decide when present (ties keep the declared source order);
+        otherwise the query is embedded and compared with the source centroids.
+        Returns an empty list when neither signal is available.
+        """
+        counts = self.keyword_scores(query)
+        total = sum(counts.values())
+        if total:
+            return sorted(((source, count / total) for source, count in counts.items()),
+                          key=lambda item: item[1], reverse=True)
+
+        if self.centroids is None or embed is None:
+            return []
+        query_vector = np.asarray(embed(query), dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        similarities = self.centroids @ (query_vector / norm if norm else query_vector)
+        weights = np.exp((similarities - similarities.max()) / self.temperature)
+        confidences = weights / weights.sum()
+        order = np.argsort(-confidences, kind="stable")
+        return [(self.centroid_sources[i], float(confidences[i])) for i in order]
@@ -1,42 +1,147 @@
-import pandas as pd
+import copy
 import json
 import logging
-from sentence_transformers import SentenceTransformer
+import os
+from dataclasses import dataclass
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
 from .api_integrations import APIIntegrations
+from .data_catalog import JobCatalog
+from .embedding_index import EmbeddingIndex
+from .cache import LRUCache, normalize_text
+from .batch_encoder import BatchEncoder
+from .vector_search import ExactSearch, FusedIndex, make_backend, recall_report
+from .ingestion import ingest_job_feed
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .query_router import QueryRouter
+from .encoders import make_encoder
+from .single_flight import SingleFlight
+from .metrics import span, timed
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent / "data" / "index"
+
+# Field holding the stable row id for each data source
+ID_FIELDS = {
+    "jobs": "job_id",
+    "sessions": "session_id",
+    "mentorship": "program_id"
+}
+
+ROUTER_CHUNK = 65536
+
+# dense: embeddings only; hybrid: dense + BM25 merged by reciprocal rank fusion;
+# auto: hybrid, except short keyword queries are answered by BM25 without encoding
+RETRIEVAL_MODES = ("dense", "hybrid", "auto")
+
+@dataclass
+class SourceCorpus:
+    """Searchable state of one source, rebuilt only when its catalog version changes"""
+    version: int
+    rows: List[Dict[str, Any]]
+    matrix: Optional[np.ndarray]
+    pos_of: np.ndarray      # catalog row -> matrix row (-1 if the row has no embedding)
+    row_of: np.ndarray      # matrix row -> catalog row (-1 if tombstoned or unused)
+    searchable: np.ndarray  # matrix rows that belong to the current catalog version
+    backend: Any
+    valid: List[int]        # catalog rows that have a description
+    descriptions: List[str]
+    bm25: Optional[BM25Index] = None
+    centroid: Optional[np.ndarray] = None
+
+    def matches(self, ranked: Iterable[int]) -> List[Dict[str, Any]]:
+        """Copies of the given catalog rows, which are shared by every request"""
+        return [copy.deepcopy(self.rows[r]) for r in ranked]
+
 class RAGPipeline:
-    def __init__(self, embedding_model: str = "all-MiniLM-L6-v2", cache_embeddings: bool = True):
+    def __init__(self,
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 cache_embeddings: bool = True,
+                 index_dir: Optional[str] = None,
+                 query_cache_entries: int = 2048,
+                 query_cache_bytes: int = 16 * 1024 * 1024,
+                 query_cache_ttl: Optional[float] = None,
+                 batch_max_size: int = 32,
+                 batch_max_wait_ms: float = 5.0,
+                 search_backends: Optional[Dict[str, Union[str, Dict[str, Any]]]] = None,
+                 retrieval_mode: Optional[str] = None,
+                 keyword_max_terms: int = 3,
+                 route_min_confidence: float = 0.5,
+                 encoder: Optional[Union[str, Dict[str, Any]]] = None):
         """Initialize RAG pipeline with specified embedding model"""
         try:
-            self.model = SentenceTransformer(embedding_model)
+            # Encoder backend spec, e.g. "int8" or {"type": "hashing", "dim": 512} (default: ASHA_ENCODER)
+            self.model = make_encoder(encoder, embedding_model)
+            # Concurrent query encodes are coalesced into one forward pass
+            self.encoder = BatchEncoder(self.model, max_batch_size=batch_max_size, max_wait_ms=batch_max_wait_ms)
             self.api = APIIntegrations()
             self.cache_embeddings = cache_embeddings
-            self._embedding_cache = {}
-            logger.info(f"Initialized RAGPipeline with model: {embedding_model}")
+            # Query embeddings keyed by normalized query text
+            self._embedding_cache = LRUCache(
+                max_entries=query_cache_entries,
+                max_bytes=query_cache_bytes,
+                ttl=query_cache_ttl
+            )
+            self.index_dir = Path(index_dir or os.getenv("ASHA_INDEX_DIR", DEFAULT_INDEX_DIR))
+            # Corpus embeddings are memory-mapped from disk, so startup never encodes
+            self.indexes = {
+                source: EmbeddingIndex(source, self.index_dir, self.model.name)
+                for source in ID_FIELDS
+            }
+            # Per-source vector search backend spec, e.g. {"jobs": {"type": "ivf", "n_probe": 8}}
+            self.search_backends = search_backends or {}
+            self._corpora: Dict[str, SourceCorpus] = {}
+            self._fused: Optional[Tuple[Tuple[int, ...], FusedIndex]] = None
+            self.retrieval_mode = retrieval_mode or os.getenv("ASHA_RETRIEVAL_MODE", "dense")
+            if self.retrieval_mode not in RETRIEVAL_MODES:
+                raise ValueError(f"Unknown retrieval mode: {self.retrieval_mode}")
+            self.keyword_max_terms = keyword_max_terms
+            # Below this routing confidence every source is searched and combined
+            self.route_min_confidence = route_min_confidence
+            self.router = QueryRouter()
+            self._router_key: Optional[Tuple[int, ...]] = None
+            # Identical concurrent searches share one computation
+            self.search_flight = SingleFlight("semantic_search")
+            # Re-embed only added/changed rows whenever a data file changes
+            self.api.catalog.subscribe(self._on_catalog_change)
+            logger.info(f"Initialized RAGPipeline with model: {self.model.name}")
         except Exception as e:
             logger.error(f"Failed to initialize RAGPipeline: {e}")
             raise
 
+    @timed("semantic_search")
     def semantic_search(self, 
                        query: str, 
                        data_source: str, 
                        top_k: int = 3, 
                        filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """Perform semantic search on the specified data source with optional filters"""
+        key = (normalize_text(query), data_source, top_k, json.dumps(filters, sort_keys=True, default=str))
+        # Matches are copies of the catalog rows, and each waiting caller gets its own copy of the leader's
+        return self.search_flight.do(key,
+                                     lambda: self._semantic_search(query, data_source, top_k, filters),
+                                     clone=copy.deepcopy)
+
+    def _semantic_search(self,
+                         query: str,
+                         data_source: str,
+                         top_k: int,
+                         filters: Optional[Dict]) -> List[Dict[str, Any]]:
         try:
-            data, descriptions = self._get_data_and_descriptions(data_source, filters)
-            if not descriptions:
+            corpus = self._get_corpus(data_source)
+            if not len(corpus.searchable):
                 logger.warning(f"No descriptions found for data source: {data_source}")
                 return []
+
+            rows = self._filter_rows(data_source, corpus, filters)
+            if rows is not None and not len(rows):
+                return []
             
-            matches = self._get_top_matches(query, descriptions, data, top_k)
+            matches = self._get_top_matches(query, corpus, top_k, rows)
             logger.info(f"Found {len(matches)} matches for query in {data_source}")
             return matches
             
@@ -44,32 +149,275 @@ class RAGPipeline:
             logger.error(f"Error in semantic search: {e}")
             return []
 
-    def _get_data_and_descriptions(self, 
-                                 data_source: str, 
-                                 filters: Optional[Dict]) -> Tuple[List[Dict], List[str]]:
-        """Get data and descriptions for the specified source"""
+    def _filter_rows(self,
+                     data_source: str,
+                     corpus: SourceCorpus,
+                     filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Catalog rows of the corpus that pass the filters (None when unfiltered)"""
+        if not filters:
+            return None
+        return self.api.filter_positions(data_source, filters, corpus.rows)
+
+    def _matrix_candidates(self, corpus: SourceCorpus, rows: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Matrix rows holding the embeddings of the given catalog rows"""
+        if rows is None:
+            return None
+        candidates = np.unique(corpus.pos_of[rows])
+        return candidates[candidates >= 0]
+
+    def _bm25(self, corpus: SourceCorpus) -> BM25Index:
+        """BM25 index over the corpus descriptions, built on first use per data version"""
+        if corpus.bm25 is None:
+            corpus.bm25 = BM25Index().fit(corpus.descriptions, corpus.valid)
+        return corpus.bm25
+
+    def _keyword_matches(self,
+                         corpus: SourceCorpus,
+                         query: str,
+                         top_k: int,
+                         rows: Optional[np.ndarray]) -> Optional[List[int]]:
+        """In auto mode, BM25-only catalog rows for a short keyword query (None otherwise)"""
+        if self.retrieval_mode != "auto" or not corpus.descriptions:
+            return None
+        bm25 = self._bm25(corpus)
+        if not bm25.covers(query, self.keyword_max_terms):
+            return None
+        hits = bm25.search(query, top_k, rows)[0]
+        return hits.tolist() if len(hits) else None
+
+    def _fusion_depth(self, top_k: int) -> int:
+        """How many dense results to fetch before rank fusion"""
+        return top_k if self.retrieval_mode == "dense" else max(4 * top_k, 20)
+
+    def _fuse_ranks(self,
+                    corpus: SourceCorpus,
+                    query: str,
+                    top_k: int,
+                    rows: Optional[np.ndarray],
+                    dense_positions: np.ndarray) -> List[int]:
+        """Final catalog rows: dense order, or dense and BM25 merged by reciprocal rank fusion"""
+        dense_rows = corpus.row_of[np.asarray(dense_positions, dtype=np.int64)]
+        if self.retrieval_mode == "dense":
+            return dense_rows[:top_k].tolist()
+        sparse_rows = self._bm25(corpus).search(query, self._fusion_depth(top_k), rows)[0]
+        return reciprocal_rank_fusion([dense_rows, sparse_rows])[:top_k]
+
+    def _get_fused(self, corpora: Dict[str, SourceCorpus]) -> FusedIndex:
+        """One stacked matrix over every exactly-searched source, rebuilt on data changes"""
+        key = tuple(corpus.version for corpus in corpora.values())
+        if self._fused is None or self._fused[0] != key:
+            blocks = {
+                source: (np.asarray(corpus.matrix[corpus.searchable]) if len(corpus.searchable)
+                         else np.empty((0, self.model.dim), dtype=np.float32))
+                for source, corpus in corpora.items()
+                if isinstance(corpus.backend, ExactSearch)
+            }
+            self._fused = (key, FusedIndex(blocks))
+        return self._fused[1]
+
+    def _centroid(self, corpus: SourceCorpus) -> Optional[np.ndarray]:
+        """Mean embedding of a corpus, summed in chunks so a memmap is never copied whole"""
+        if corpus.centroid is None and len(corpus.searchable):
+            total = np.zeros(corpus.matrix.shape[1], dtype=np.float64)
+            for start in range(0, len(corpus.searchable), ROUTER_CHUNK):
+                total += corpus.matrix[corpus.searchable[start:start + ROUTER_CHUNK]].sum(axis=0)
+            corpus.centroid = (total / len(corpus.searchable)).astype(np.float32)
+        return corpus.centroid
+
+    def _fit_router(self, corpora: Dict[str, SourceCorpus]) -> QueryRouter:
+        """Router with centroids of the current corpora"""
+        key = tuple(corpus.version for corpus in corpora.values())
+        if self._router_key != key:
+            self.router.fit_centroids({source: self._centroid(corpus) for source, corpus in corpora.items()})
+            self._router_key = key
+        return self.router
+
+    def route(self, query: str) -> List[Tuple[str, float]]:
+        """Sources ranked by routing confidence (keywords first, then nearest centroid)"""
+        corpora = {source: self._get_corpus(source) for source in ID_FIELDS}
+        return self._fit_router(corpora).route(query, self.encode_query)
+
+    def search_all(self,
+                   query: str,
+                   top_k: int = 3,
+                   filters: Optional[Dict] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Per-source top-k for one query: encoded once, scored in a single fused pass"""
+        corpora = {source: self._get_corpus(source) for source in ID_FIELDS}
+        filtered = {source: self._filter_rows(source, corpus, filters) for source, corpus in corpora.items()}
+
+        keyword = {
+            source: self._keyword_matches(corpus, query, top_k, filtered[source])
+            for source, corpus in corpora.items()
+        }
+        if any(keyword.values()):
+            # Lexical hits answer keyword queries without touching the encoder
+            return {source: corpora[source].matches(keyword[source] or []) for source in corpora}
+
+        depth = self._fusion_depth(top_k)
+        fused = self._get_fused(corpora)
+        query_embedding = self.encode_query(query)
+        candidates = {source: self._matrix_candidates(corpus, filtered[source]) for source, corpus in corpora.items()}
+        # Fused blocks hold only searchable rows, so translate to block-local numbers
+        with span("similarity_scoring"):
+            hits = fused.search(query_embedding, depth, {
+                source: None if rows is None else np.searchsorted(corpora[source].searchable, rows)
+                for source, rows in candidates.items() if source in fused.offsets
+            })
+
+        results = {}
+        for source, corpus in corpora.items():
+            if candidates[source] is not None and not len(candidates[source]):
+                results[source] = []
+                continue
+            if source in hits:
+                positions = corpus.searchable[hits[source][0]]
+            else:
+                # ANN-backed sources keep their own index but reuse the query embedding
+                positions = corpus.backend.search(query_embedding, depth, candidates[source])[0]
+            ranked = self._fuse_ranks(corpus, query, top_k, filtered[source], positions)
+            results[source] = corpus.matches(ranked)
+        return results
+
+    @timed("description_build")
+    def _describe(self, data_source: str, rows: List[Dict]) -> Tuple[List[int], List[str]]:
+        """Positions of the valid rows and the description embedded for each of them"""
+        if isinstance(rows, JobCatalog):
+            # Precomputed column-wise when the catalog was loaded
+            return rows.valid_positions.tolist(), rows.descriptions
         if data_source == "jobs":
-            data = self.api.fetch_job_listings(filters=filters)
+            valid = [i for i, item in enumerate(rows) if self._validate_job_item(item)]
             descriptions = [
-                f"{item['job_title']} at {item['company']} in {item['location']} ({item['industry']})"
-                for item in data if self._validate_job_item(item)
+                f"{rows[i]['job_title']} at {rows[i]['company']} in {rows[i]['location']} ({rows[i]['industry']})"
+                for i in valid
             ]
         elif data_source == "sessions":
-            data = self.api.fetch_events()
+            valid = [i for i, item in enumerate(rows) if self._validate_session_item(item)]
             descriptions = [
-                f"{item['title']} - {item['description']}"
-                for item in data if self._validate_session_item(item)
+                f"{rows[i]['title']} - {rows[i]['description']}"
+                for i in valid
             ]
         elif data_source == "mentorship":
-            data = self.api.fetch_mentorship_programs(filters=filters)
+            valid = [i for i, item in enumerate(rows) if self._validate_mentorship_item(item)]
             descriptions = [
-                f"{item['title']} - {item['description']}"
-                for item in data if self._validate_mentorship_item(item)
+                f"{rows[i]['title']} - {rows[i]['description']}"
+                for i in valid
             ]
         else:
             raise ValueError(f"Unknown data source: {data_source}")
-            
-        return data, descriptions
+
+        return valid, descriptions
+
+    def _row_ids(self, data_source: str, rows: List[Dict], positions: List[int]) -> List[str]:
+        """Stable row ids for the index sidecar, falling back to position"""
+        if isinstance(rows, JobCatalog):
+            ids = rows.ids()
+            return [ids[i] for i in positions]
+        field = ID_FIELDS[data_source]
+        return [str(rows[i].get(field, i)) for i in positions]
+
+    def _encode_corpus(self, descriptions: List[str]) -> np.ndarray:
+        """Encode corpus descriptions as a float32 matrix"""
+        return self.model.encode(descriptions, convert_to_numpy=True)
+
+    def _on_catalog_change(self, data_source: str, rows: List[Dict], diff) -> None:
+        """Catalog listener: embed new rows and tombstone removed ones"""
+        if not self.cache_embeddings:
+            return
+        valid, descriptions = self._describe(data_source, rows)
+        stats = self.indexes[data_source].sync(
+            self._row_ids(data_source, rows, valid), descriptions, self._encode_corpus
+        )
+        logger.info(f"Synced index '{data_source}': {stats['added']} embedded, "
+                    f"{stats['tombstoned']} tombstoned, {stats['rows']} rows")
+
+    def _get_corpus(self, data_source: str) -> SourceCorpus:
+        """Current corpus for a source, rebuilding embeddings and backend on data changes"""
+        if data_source not in ID_FIELDS:
+            raise ValueError(f"Unknown data source: {data_source}")
+        with span("data_load"):
+            rows = self.api.catalog.rows(data_source)
+            version = self.api.catalog.version(data_source)
+        corpus = self._corpora.get(data_source)
+        if corpus is not None and corpus.version == version:
+            return corpus
+
+        valid, descriptions = self._describe(data_source, rows)
+        if self.cache_embeddings:
+            index = self.indexes[data_source]
+            positions = index.ensure(self._row_ids(data_source, rows, valid), descriptions, self._encode_corpus)
+            matrix = index.matrix
+        else:
+            positions = list(range(len(descriptions)))
+            matrix = self._encode_corpus(descriptions) if descriptions else None
+
+        pos_of = np.full(len(rows), -1, dtype=np.int64)
+        pos_of[valid] = positions
+        row_of = np.full(0 if matrix is None else len(matrix), -1, dtype=np.int64)
+        # Reverse so the first row wins when two rows share a description
+        row_of[positions[::-1]] = valid[::-1]
+        searchable = np.flatnonzero(row_of >= 0)
+
+        backend = make_backend(self.search_backends.get(data_source))
+        if matrix is not None:
+            backend.fit(matrix, None if len(searchable) == len(matrix) else searchable)
+        corpus = SourceCorpus(version, rows, matrix, pos_of, row_of, searchable, backend, valid, descriptions)
+        self._corpora[data_source] = corpus
+        return corpus
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Query embedding, served from the LRU cache when possible"""
+        with span("query_encode"):
+            if not self.cache_embeddings:
+                return self.encoder.encode(query)
+            key = normalize_text(query)
+            return self._embedding_cache.get_or_compute(key, lambda: self.encoder.encode(key))
+
+    def warm_up(self, encode: bool = True) -> None:
+        """
+        Load every corpus and build the fused index and router so the first request is fast.
+
+        encode=False skips the trial forward pass; a process that forks workers
+        afterwards should not have started the model's thread pools.
+        """
+        corpora = {source: self._get_corpus(source) for source in ID_FIELDS}
+        self._get_fused(corpora)
+        self._fit_router(corpora)
+        if encode:
+            self.encoder.encode("warm up")
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters for the query embedding cache"""
+        return self._embedding_cache.stats()
+
+    def _prime_query_cache(self, queries: List[str]) -> None:
+        """Encode all uncached queries in one batch and store them in the cache"""
+        keys = list(dict.fromkeys(normalize_text(query) for query in queries))
+        missing = [key for key in keys if key not in self._embedding_cache]
+        if not missing:
+            return
+        for key, vector in zip(missing, self.encoder.encode_many(missing)):
+            self._embedding_cache.set(key, vector)
+
+    def ingest_job_feed(self,
+                        path: Optional[str] = None,
+                        chunksize: int = 10000,
+                        batch_size: int = 256) -> Dict[str, int]:
+        """Stream a (possibly very large) job feed into the jobs index in bounded memory"""
+        path = Path(path) if path else self.api.data_path / "job_listing_data.csv"
+        return ingest_job_feed(path, self.indexes["jobs"], self._encode_corpus,
+                               chunksize=chunksize, batch_size=batch_size)
+
+    def recall_report(self,
+                      data_source: str,
+                      queries: List[str],
+                      k: int = 10,
+                      backends: Optional[List[Union[str, Dict[str, Any]]]] = None) -> Dict[str, Dict[str, float]]:
+        """recall@k and latency of ANN backends against exact search on a real source"""
+        corpus = self._get_corpus(data_source)
+        matrix = np.asarray(corpus.matrix[corpus.searchable])
+        query_vectors = self.encoder.encode_many(queries)
+        specs = backends or [self.search_backends.get(data_source) or "ivf"]
+        return recall_report(matrix, query_vectors, k, specs)
 
     def _validate_job_item(self, item: Dict) -> bool:
         """Validate job listing item"""
@@ -86,36 +434,19 @@ class RAGPipeline:
 
     def _get_top_matches(self, 
                         query: str, 
-                        descriptions: List[str], 
-                        data: Any, 
-                        top_k: int) -> List[Dict[str, Any]]:
-        """Get top matching results based on semantic similarity"""
+                        corpus: SourceCorpus, 
+                        top_k: int,
+                        rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Get top matching results based on semantic similarity (plus BM25 in hybrid modes)"""
         try:
-            # Get or compute query embedding
-            cache_key = f"query_{hash(query)}"
-            query_embedding = (self._embedding_cache.get(cache_key) if self.cache_embeddings 
-                            else self.model.encode(query, convert_to_tensor=True))
-            
-            if self.cache_embeddings and cache_key not in self._embedding_cache:
-                self._embedding_cache[cache_key] = query_embedding
-
-            # Get or compute corpus embeddings
-            corpus_key = f"corpus_{hash(str(descriptions))}"
-            corpus_embeddings = (self._embedding_cache.get(corpus_key) if self.cache_embeddings 
-                               else self.model.encode(descriptions, convert_to_tensor=True))
-            
-            if self.cache_embeddings and corpus_key not in self._embedding_cache:
-                self._embedding_cache[corpus_key] = corpus_embeddings
-
-            # Calculate similarities and get top matches
-            similarities = np.inner(query_embedding, corpus_embeddings)
-            top_k = min(top_k, len(descriptions))
-            top_indices = similarities.argsort()[-top_k:][::-1]
-
-            # Return results based on data type
-            if isinstance(data, pd.DataFrame):
-                return [data.iloc[i].to_dict() for i in top_indices]
-            return [data[i] for i in top_indices]
+            ranked = self._keyword_matches(corpus, query, top_k, rows)
+            if ranked is None:
+                query_embedding = self.encode_query(query)
+                with span("similarity_scoring"):
+                    candidates = self._matrix_candidates(corpus, rows)
+                    positions, _ = corpus.backend.search(query_embedding, self._fusion_depth(top_k), candidates)
+                    ranked = self._fuse_ranks(corpus, query, top_k, rows, positions)
+            return corpus.matches(ranked)
 
         except Exception as e:
             logger.error(f"Error in getting top matches: {e}")
@@ -125,30 +456,34 @@ class RAGPipeline:
         """Main method to retrieve information based on user query"""
         try:
             query = query.lower()
-            keywords = {
-                "jobs": ["job", "career", "position", "work", "employment", "hiring"],
-                "sessions": ["session", "workshop", "training", "event", "webinar"],
-                "mentorship": ["mentor", "guidance", "program", "coaching", "advice"]
-            }
+            routes = self.route(query)
 
-            # Try to find best matching source
-            for source, terms in keywords.items():
-                if any(term in query for term in terms):
-                    result = self.semantic_search(query, source, filters=filters)
-                    if result:
-                        return {"source": source, "data": result}
+            # Search only the most likely source when routing is confident
+            if routes and routes[0][1] >= self.route_min_confidence:
+                source, confidence = routes[0]
+                matches = self.semantic_search(query, source, top_k=3, filters=filters)
+                if matches:
+                    return {"source": source, "data": matches, "confidence": confidence}
 
             # Return combined results if no specific match
             logger.info("No specific source match found, returning combined results")
+            results = self.search_all(query, top_k=3, filters=filters)
             return {
                 "source": "combined",
-                "data": {
-                    "jobs": self.semantic_search(query, "jobs", top_k=1, filters=filters),
-                    "sessions": self.semantic_search(query, "sessions", top_k=1),
-                    "mentorship": self.semantic_search(query, "mentorship", top_k=1, filters=filters)
-                }
+                "data": {source: matches[:1] for source, matches in results.items()}
             }
 
         except Exception as e:
             logger.error(f"Error in retrieve_information: {e}")
-            return {"source": "error", "data": []}
\ No newline at end of file
+            return {"source": "error", "data": []}
+
+    def retrieve_information_batch(self,
+                                   queries: List[str],
+                                   filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Retrieve information for several queries, encoding them as one batch"""
+        if self.cache_embeddings:
+            try:
+                self._prime_query_cache(queries)
+            except Exception as e:
+                logger.error(f"Error batch-encoding queries: {e}")
+        return [self.retrieve_information(query, filters=filters) for query in queries]
@@ -0,0 +1,299 @@
+"""
+Conversation history storage.
+
+A `SessionStore` maps a session id to that session's list of messages (any
+JSON-serializable dicts). Sessions expire after `ttl` seconds without a new
+message, each session keeps at most `max_messages`, and the store as a whole is
+capped by session count and approximate bytes, dropping the least recently
+updated sessions first.
+
+- `memory`: an in-process LRU (`LRUCache`). Fast, but every worker process has
+  its own copy, so multi-turn context is lost when requests of one session are
+  balanced across workers.
+- `sqlite`: a SQLite database in WAL mode shared by every process on the host.
+  Appends run in an immediate transaction so concurrent workers do not lose
+  each other's messages.
+
+`make_session_store()` picks the backend from ASHA_SESSION_STORE (gunicorn.conf.py
+selects `sqlite` when it runs more than one worker). Several stores can share
+one database under different namespaces.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "sessions.db"
+# The SQLite store enforces its session and byte caps every this many writes
+PURGE_INTERVAL = 100
+
+
+def history_size(messages: List[Message]) -> int:
+    """Approximate in-memory bytes of a message list"""
+    size = sys.getsizeof(messages)
+    for message in messages:
+        size += sys.getsizeof(message) + sum(sys.getsizeof(value) for value in message.values())
+    return size
+
+
+class SessionStore(ABC):
+    kind = "base"
+
+    def __init__(self,
+                 namespace: str = "default",
+                 ttl: Optional[float] = 86400.0,
+                 max_sessions: int = 10000,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 max_messages: int = 200):
+        """Sessions idle for more than ttl seconds expire; see the module docstring for the caps"""
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+
+    @abstractmethod
+    def get(self, session_id: str) -> List[Message]:
+        """The session's messages, oldest first ([] for unknown or expired sessions)"""
+
+    @abstractmethod
+    def append(self, session_id: str, *messages: Message, max_messages: Optional[int] = None) -> List[Message]:
+        """
+        Add messages to a session (creating it) and return its updated history,
+        trimmed to the newest max_messages (default: the store's limit).
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Forget one session"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete every session in this store's namespace"""
+
+    @abstractmethod
+    def sessions(self) -> Dict[str, List[Message]]:
+        """Every live session's history"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Session counts and backend counters, for /api/stats"""
+
+    def __contains__(self, session_id: str) -> bool:
+        return bool(self.get(session_id))
+
+    def _limit(self, max_messages: Optional[int]) -> int:
+        return min(max_messages or self.max_messages, self.max_messages)
+
+
+class MemorySessionStore(SessionStore):
+    kind = "memory"
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self._sessions = LRUCache(max_entries=self.max_sessions, max_bytes=self.max_bytes,
+                                  ttl=self.ttl, sizeof=history_size)
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> List[Message]:
+        return list(self._sessions.get(session_id, ()))
+
+    def append(self, session_id: str, *messages: Message, max_messages: Optional[int] = None) -> List[Message]:
+        with self._lock:
+            history = self._sessions.get(session_id, [])
+            history = (history + list(messages))[-self._limit(max_messages):]
+            # Re-inserting refreshes the idle timer and the LRU position
+            self._sessions.set(session_id, history)
+        return list(history)
+
+    def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def sessions(self) -> Dict[str, List[Message]]:
+        live = {key: self.get(key) for key in self._sessions.keys()}
+        return {key: history for key, history in live.items() if history}
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._sessions.stats()
+        return {
+            "backend": self.kind,
+            "namespace": self.namespace,
+            "sessions": stats["entries"],
+            "bytes": stats["bytes"],
+            "evictions": stats["evictions"],
+            "expirations": stats["expirations"],
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    kind = "sqlite"
+
+    def __init__(self, path: Union[str, Path, None] = None, **params):
+        super().__init__(**params)
+        self.path = Path(path or os.getenv("ASHA_SESSION_DB", DEFAULT_DB_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.evictions = 0
+        self.expirations = 0
+        self._writes = 0
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                namespace TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                history TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (namespace, session_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (namespace, updated)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection; connections are never shared across threads or forked processes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expired(self, updated: float) -> bool:
+        return self.ttl is not None and time.time() - updated > self.ttl
+
+    def get(self, session_id: str) -> List[Message]:
+        row = self._connection().execute(
+            "SELECT history, updated FROM sessions WHERE namespace = ? AND session_id = ?",
+            (self.namespace, session_id)
+        ).fetchone()
+        if row is None:
+            return []
+        if self._expired(row[1]):
+            self.delete(session_id)
+            self.expirations += 1
+            return []
+        return json.loads(row[0])
+
+    def append(self, session_id: str, *messages: Message, max_messages: Optional[int] = None) -> List[Message]:
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock before reading, so concurrent
+        # appends from other workers are serialized rather than overwritten
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT history, updated FROM sessions WHERE namespace = ? AND session_id = ?",
+                (self.namespace, session_id)
+            ).fetchone()
+            history = json.loads(row[0]) if row is not None and not self._expired(row[1]) else []
+            history = (history + list(messages))[-self._limit(max_messages):]
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (namespace, session_id, history, updated) VALUES (?, ?, ?, ?)",
+                (self.namespace, session_id, json.dumps(history, default=str), time.time())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % PURGE_INTERVAL == 0:
+            self.purge()
+        return history
+
+    def purge(self) -> None:
+        """Drop expired sessions, then the least recently updated ones beyond the caps"""
+        conn = self._connection()
+        if self.ttl is not None:
+            cursor = conn.execute("DELETE FROM sessions WHERE namespace = ? AND updated < ?",
+                                  (self.namespace, time.time() - self.ttl))
+            self.expirations += cursor.rowcount
+        cursor = conn.execute("""
+            DELETE FROM sessions WHERE namespace = ? AND session_id IN (
+                SELECT session_id FROM sessions WHERE namespace = ?
+                ORDER BY updated DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.namespace, self.namespace, self.max_sessions))
+        self.evictions += cursor.rowcount
+        if self.max_bytes is not None:
+            cursor = conn.execute("""
+                DELETE FROM sessions WHERE namespace = ? AND session_id IN (
+                    SELECT session_id FROM (
+                        SELECT session_id, SUM(LENGTH(history)) OVER (ORDER BY updated DESC) AS total
+                        FROM sessions WHERE namespace = ?
+                    ) WHERE total > ?
+                )
+            """, (self.namespace, self.namespace, self.max_bytes))
+            self.evictions += cursor.rowcount
+
+    def delete(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE namespace = ? AND session_id = ?",
+                                   (self.namespace, session_id))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE namespace = ?", (self.namespace,))
+
+    def sessions(self) -> Dict[str, List[Message]]:
+        rows = self._connection().execute(
+            "SELECT session_id, history, updated FROM sessions WHERE namespace = ?", (self.namespace,)
+        ).fetchall()
+        return {session_id: json.loads(history) for session_id, history, updated in rows
+                if not self._expired(updated)}
+
+    def stats(self) -> Dict[str, Any]:
+        count, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(history)), 0) FROM sessions WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()
+        return {
+            "backend": self.kind,
+            "namespace": self.namespace,
+            "sessions": count,
+            "bytes": size,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+SESSION_STORES = {
+    MemorySessionStore.kind: MemorySessionStore,
+    SQLiteSessionStore.kind: SQLiteSessionStore,
+}
+
+
+def make_session_store(spec: Union[None, str, Dict[str, Any]] = None, namespace: str = "default") -> SessionStore:
+    """
+    Build a store from a kind ("memory", "sqlite") or a dict with "type" plus
+    parameters. Unset limits come from ASHA_SESSION_TTL (seconds idle),
+    ASHA_SESSION_MAX (sessions), ASHA_SESSION_MAX_MB and ASHA_SESSION_MAX_MESSAGES.
+    """
+    if spec is None:
+        spec = os.getenv("ASHA_SESSION_STORE", MemorySessionStore.kind)
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    params = dict(spec)
+    kind = params.pop("type", MemorySessionStore.kind)
+    if kind not in SESSION_STORES:
+        raise ValueError(f"Unknown session store: {kind}")
+    ttl = float(os.getenv("ASHA_SESSION_TTL", "86400"))
+    params.setdefault("namespace", namespace)
+    params.setdefault("ttl", ttl if ttl > 0 else None)
+    params.setdefault("max_sessions", int(os.getenv("ASHA_SESSION_MAX", "10000")))
+    params.setdefault("max_bytes", int(float(os.getenv("ASHA_SESSION_MAX_MB", "64")) * 1024 * 1024))
+    params.setdefault("max_messages", int(os.getenv("ASHA_SESSION_MAX_MESSAGES", "200")))
+    return SESSION_STORES[kind](**params)
@@ -0,0 +1,133 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When many requests ask for the same thing at once (a cohort pasting the same
+prompt after a webinar), `SingleFlight.do` runs the computation once per key:
+the first caller computes, callers arriving while it is in flight wait for and
+receive the same result, and the key is forgotten as soon as the call finishes
+(this is not a cache). `coalesced` counts the calls that did not compute.
+`AsyncSingleFlight` does the same for coroutines on one event loop. Every
+instance is listed in `FLIGHTS` by name so their counters can be reported.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+FLIGHTS: "weakref.WeakValueDictionary[str, SingleFlight]" = weakref.WeakValueDictionary()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        FLIGHTS[name] = self
+
+    def _join(self, key: Hashable, new_call: Callable[[], Any]):
+        """(call, leader): the in-flight call for key, registering a new one if there is none"""
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            if call is None:
+                call = self._in_flight[key] = new_call()
+                self.executions += 1
+                return call, True
+            self.coalesced += 1
+            return call, False
+
+    def _leave(self, key: Hashable):
+        with self._lock:
+            del self._in_flight[key]
+
+    def do(self,
+           key: Hashable,
+           compute: Callable[[], Any],
+           clone: Optional[Callable[[Any], Any]] = None,
+           share_errors: bool = True) -> Any:
+        """
+        compute() once for all concurrent callers with this key.
+
+        Waiting callers get clone(result) when clone is given, so they can mutate
+        their copy. With share_errors=False a caller whose leader failed retries
+        on its own instead of re-raising the leader's exception (for calls that
+        fail per caller, such as a request made with someone else's API key).
+        """
+        call, leader = self._join(key, _Call)
+        if leader:
+            try:
+                call.result = compute()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                self._leave(key)
+                call.done.set()
+
+        call.done.wait()
+        if call.error is not None:
+            if share_errors:
+                raise call.error
+            return compute()
+        return clone(call.result) if clone else call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+        }
+
+
+class _AsyncCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class AsyncSingleFlight(SingleFlight):
+    async def do(self,
+                 key: Hashable,
+                 compute: Callable[[], Awaitable[Any]],
+                 clone: Optional[Callable[[Any], Any]] = None,
+                 share_errors: bool = True) -> Any:
+        """await compute() once for all concurrent callers with this key (see SingleFlight.do)"""
+        call, leader = self._join(key, _AsyncCall)
+        if leader:
+            try:
+                call.result = await compute()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                self._leave(key)
+                call.done.set()
+
+        await call.done.wait()
+        if call.error is not None:
+            # A cancelled leader (its client went away) says nothing about this caller
+            if share_errors and not isinstance(call.error, asyncio.CancelledError):
+                raise call.error
+            return await compute()
+        return clone(call.result) if clone else call.result
@@ -0,0 +1,176 @@
+"""
+Startup profiling and background warm-up of heavy components.
+
+Importing the encoder stack (torch, sentence-transformers, pandas) and building
+the RAG pipeline takes seconds, so the web app must not do it on the import
+path. `Warmup` builds a component on a daemon thread and exposes a readiness
+flag; request handlers that do not need the component are never blocked by it.
+`PROFILE` records how long each import and init phase took so slow boots can be
+diagnosed (`python wsgi.py --profile-startup`, or `GET /api/ready`), and
+`memory_usage` reports how much of a worker's memory is shared with its siblings.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    def __init__(self):
+        """Named phase durations, in the order they finished"""
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(seconds, 4) for name, seconds in self.phases}
+
+    def report(self) -> str:
+        """Phase table plus wall time since the profile was created"""
+        with self._lock:
+            phases = list(self.phases)
+        width = max((len(name) for name, _ in phases), default=10)
+        lines = [f"{name:<{width}}  {seconds * 1000:9.1f} ms" for name, seconds in phases]
+        lines.append(f"{'wall time since start':<{width}}  {(time.perf_counter() - self.started) * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+# Process-wide profile shared by the web app, the bot and the pipeline
+PROFILE = StartupProfile()
+
+
+class Warmup:
+    def __init__(self, name: str, factory: Callable[[], Any], profile: StartupProfile = PROFILE):
+        """Build factory() once on a background thread; get() waits for it"""
+        self.name = name
+        self.factory = factory
+        self.profile = profile
+        self.error: Optional[BaseException] = None
+        self._value: Any = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """True once the component was built successfully"""
+        return self._done.is_set() and self.error is None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> "Warmup":
+        """Begin building in the background (no-op if already started)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"warmup-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def reset(self) -> "Warmup":
+        """Forget a failed or finished build so the next start() builds again"""
+        with self._lock:
+            self.error = None
+            self._value = None
+            self._done = threading.Event()
+            self._thread = None
+        return self
+
+    def _run(self):
+        try:
+            with self.profile.phase(f"warm-up {self.name}"):
+                self._value = self.factory()
+            logger.info(f"{self.name} is ready")
+        except BaseException as e:
+            self.error = e
+            logger.error(f"Warm-up of {self.name} failed: {e}")
+        finally:
+            self._done.set()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """The built component, starting the warm-up if needed and waiting up to timeout"""
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} is still warming up")
+        if self.error is not None:
+            raise RuntimeError(f"{self.name} failed to initialize: {self.error}") from self.error
+        return self._value
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started": self.started,
+            "ready": self.ready,
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+def _build_rag_pipeline():
+    with PROFILE.phase("import src.rag_pipeline"):
+        from .rag_pipeline import RAGPipeline
+    with PROFILE.phase("init RAGPipeline"):
+        pipeline = RAGPipeline()
+    with PROFILE.phase("warm RAGPipeline indexes"):
+        # Under a preloading gunicorn master the first encode happens in the workers
+        pipeline.warm_up(encode=os.environ.get("ASHA_PRELOAD_MASTER") != "1")
+    return pipeline
+
+
+def memory_usage() -> Dict[str, Any]:
+    """
+    Resident memory of this process in MB.
+
+    pss_mb splits shared pages between the processes mapping them, so summing it
+    over workers gives their real footprint; private_mb is what only this
+    process holds. Zeros where /proc is unavailable.
+    """
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb",
+              "Private_Clean": "private_mb", "Private_Dirty": "private_mb"}
+    usage = {"rss_mb": 0.0, "pss_mb": 0.0, "shared_mb": 0.0, "private_mb": 0.0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] += int(rest.split()[0]) / 1024
+    except (OSError, ValueError):
+        try:
+            with open("/proc/self/statm") as f:
+                usage["rss_mb"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, AttributeError):
+            pass
+    return {"pid": os.getpid(), **{key: round(value, 1) for key, value in usage.items()}}
+
+
+_rag_warmup: Optional[Warmup] = None
+_rag_lock = threading.Lock()
+
+
+def rag_warmup_enabled() -> bool:
+    """False when ASHA_RAG_WARMUP=0: web workers then never build the pipeline"""
+    return os.environ.get("ASHA_RAG_WARMUP", "1") != "0"
+
+
+def rag_warmup() -> Warmup:
+    """The process-wide warm-up handle for the RAG pipeline (not started until asked)"""
+    global _rag_warmup
+    with _rag_lock:
+        if _rag_warmup is None:
+            _rag_warmup = Warmup("rag_pipeline", _build_rag_pipeline)
+        return _rag_warmup
@@ -0,0 +1,365 @@
+"""
+Shared HTTP client for the upstream LLM API.
+
+Every chat turn used to open a fresh TCP + TLS connection via the module-level
+`requests.post`. `UpstreamClient` keeps one pooled keep-alive `requests.Session`
+per API key (so users' keys never share connection state), applies connect and
+read timeouts, and retries 429/5xx responses and connection failures with
+jittered exponential backoff, honouring `Retry-After`. `get_client()` returns the
+process-wide instance configured from the environment. `AsyncUpstreamClient`
+(`get_async_client()`) is the same client for the ASGI app, built on
+`httpx.AsyncClient` so waiting on the upstream does not hold a thread.
+
+Both clients go through the upstream circuit breaker (src/circuit_breaker.py):
+while it is open, post() raises `CircuitOpen` without touching the network. A
+`deadline` (a `time.monotonic()` value) caps the timeouts of each attempt and
+stops retries that could not finish in time.
+
+- ASHA_LLM_BASE_URL         OpenAI-compatible base URL (default: Groq)
+- ASHA_UPSTREAM_POOL_SIZE   keep-alive connections per API key (default 10)
+- ASHA_UPSTREAM_TIMEOUT     read timeout in seconds (default 30)
+- ASHA_UPSTREAM_RETRIES     retries after the first attempt (default 2)
+- ASHA_ASYNC_POOL_SIZE      connections of the async client, all keys (default 200)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import CircuitBreaker, CircuitOpen, get_upstream_breaker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.groq.com/openai/v1"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_delay(attempt: int, response: Any = None, base: float = 0.5, maximum: float = 8.0) -> float:
+    """Seconds to wait before retry number attempt + 1 (Retry-After when the response sends one, else full jitter)"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.replace(".", "", 1).isdigit():
+            return min(float(retry_after), maximum)
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def capped_timeout(timeout: float, deadline: Optional[float]) -> float:
+    """timeout, shortened to the time left before deadline"""
+    if deadline is None:
+        return timeout
+    return min(timeout, max(0.01, deadline - time.monotonic()))
+
+
+def can_retry(delay: float, deadline: Optional[float]) -> bool:
+    """Whether a retry after delay seconds still leaves time before the deadline"""
+    return deadline is None or time.monotonic() + delay < deadline
+
+
+def upstream_unavailable(error: BaseException) -> bool:
+    """
+    True when error says the upstream itself is unavailable (breaker open,
+    timeout, connection failure or 5xx), as opposed to a rejected request such
+    as a bad API key. Works for requests and httpx errors.
+    """
+    if isinstance(error, CircuitOpen):
+        return True
+    response = getattr(error, "response", None)
+    return response is None or response.status_code >= 500
+
+
+class UpstreamClient:
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 pool_size: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 max_retries: int = 2,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 8.0,
+                 max_sessions: int = 256,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Pooled client for one upstream; sessions beyond max_sessions (distinct API
+        keys) are closed least recently used first.
+        """
+        self.base_url = (base_url or os.getenv("ASHA_LLM_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_sessions = max_sessions
+        self.breaker = breaker
+        self.requests = 0
+        self.retries = 0
+        self._sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        # Sessions are looked up by a digest so raw keys are not kept as dict keys
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def session(self, api_key: str) -> requests.Session:
+        """Keep-alive session carrying this API key, created on first use"""
+        key = self._key(api_key)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+            session = requests.Session()
+            # Retries are handled in post() so they can back off with jitter
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
+            })
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                evicted.close()
+            return session
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        return retry_delay(attempt, response, self.backoff_base, self.backoff_max)
+
+    def post(self,
+             path: str,
+             api_key: str,
+             payload: Dict[str, Any],
+             stream: bool = False,
+             deadline: Optional[float] = None) -> requests.Response:
+        """
+        POST payload to base_url + path, retrying 429/5xx and connection errors.
+
+        The last response is returned as-is (call raise_for_status()); connection
+        errors are re-raised once the retries are used up. Raises CircuitOpen
+        when the breaker refuses the call.
+        """
+        probe = self.breaker.acquire(deadline) if self.breaker else False
+        started = time.monotonic()
+        failed = None
+        try:
+            response = self._post(path, api_key, payload, stream, deadline)
+            failed = response.status_code >= 500
+            return response
+        except requests.exceptions.RequestException:
+            failed = True
+            raise
+        finally:
+            if self.breaker:
+                self.breaker.record(probe, time.monotonic() - started, failed)
+
+    def _post(self,
+              path: str,
+              api_key: str,
+              payload: Dict[str, Any],
+              stream: bool,
+              deadline: Optional[float]) -> requests.Response:
+        session = self.session(api_key)
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            self.requests += 1
+            timeout = tuple(capped_timeout(t, deadline) for t in self.timeout)
+            try:
+                response = session.post(url, json=payload, stream=stream, timeout=timeout)
+            except requests.exceptions.ConnectionError as e:
+                delay = self._backoff(attempt)
+                if attempt >= self.max_retries or not can_retry(delay, deadline):
+                    raise
+                logger.warning(f"Upstream connection failed ({e}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                if not can_retry(delay, deadline):
+                    return response
+                logger.warning(f"Upstream returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            attempt += 1
+            self.retries += 1
+            time.sleep(delay)
+
+    def chat_completion(self,
+                        api_key: str,
+                        payload: Dict[str, Any],
+                        stream: bool = False,
+                        deadline: Optional[float] = None) -> requests.Response:
+        """POST /chat/completions; pass stream=True for a server-sent event stream"""
+        return self.post("/chat/completions", api_key, payload, stream=stream, deadline=deadline)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "retries": self.retries, "sessions": len(self._sessions)}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_client: Optional[UpstreamClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> UpstreamClient:
+    """The process-wide upstream client, configured from the environment on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = UpstreamClient(
+                pool_size=int(os.getenv("ASHA_UPSTREAM_POOL_SIZE", "10")),
+                read_timeout=float(os.getenv("ASHA_UPSTREAM_TIMEOUT", "30")),
+                max_retries=int(os.getenv("ASHA_UPSTREAM_RETRIES", "2")),
+                breaker=get_upstream_breaker()
+            )
+        return _client
+
+
+class AsyncUpstreamClient:
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 pool_size: int = 200,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 max_retries: int = 2,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 8.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Non-blocking counterpart of UpstreamClient. One httpx.AsyncClient (created
+        on first use, in the event loop that uses it) pools pool_size keep-alive
+        connections; the API key travels per request.
+        """
+        self.base_url = (base_url or os.getenv("ASHA_LLM_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.requests = 0
+        self.retries = 0
+        self._http = None
+
+    def _client(self):
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            )
+        return self._http
+
+    async def post(self,
+                   path: str,
+                   api_key: str,
+                   payload: Dict[str, Any],
+                   stream: bool = False,
+                   deadline: Optional[float] = None):
+        """
+        POST payload to base_url + path, retrying 429/5xx and connection errors.
+
+        Returns the last httpx.Response as-is (call raise_for_status()). With
+        stream=True the body is not read yet: iterate it, then await aclose().
+        Raises CircuitOpen when the breaker refuses the call.
+        """
+        import httpx
+
+        probe = self.breaker.acquire(deadline) if self.breaker else False
+        started = time.monotonic()
+        failed = None
+        try:
+            response = await self._post(path, api_key, payload, stream, deadline)
+            failed = response.status_code >= 500
+            return response
+        except httpx.HTTPError:
+            failed = True
+            raise
+        finally:
+            # A cancelled call (failed is None) only gives back its probe
+            if self.breaker:
+                self.breaker.record(probe, time.monotonic() - started, failed)
+
+    async def _post(self, path: str, api_key: str, payload: Dict[str, Any], stream: bool, deadline: Optional[float]):
+        import httpx
+
+        client = self._client()
+        attempt = 0
+        while True:
+            self.requests += 1
+            timeout = httpx.Timeout(capped_timeout(self.read_timeout, deadline),
+                                    connect=capped_timeout(self.connect_timeout, deadline))
+            request = client.build_request("POST", f"{self.base_url}{path}", json=payload, headers={
+                "Authorization": f"Bearer {api_key}"
+            }, timeout=timeout)
+            try:
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                delay = retry_delay(attempt, None, self.backoff_base, self.backoff_max)
+                if attempt >= self.max_retries or not can_retry(delay, deadline):
+                    raise
+                logger.warning(f"Upstream connection failed ({e}), retrying in {delay:.2f}s")
+            else:
+                done = response.status_code not in RETRY_STATUSES or attempt >= self.max_retries
+                if not done:
+                    delay = retry_delay(attempt, response, self.backoff_base, self.backoff_max)
+                    done = not can_retry(delay, deadline)
+                if done:
+                    if stream and response.is_error:
+                        # Error bodies are small; read them so raise_for_status() callers can report them
+                        await response.aread()
+                    return response
+                logger.warning(f"Upstream returned {response.status_code}, retrying in {delay:.2f}s")
+                await response.aclose()
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def chat_completion(self,
+                              api_key: str,
+                              payload: Dict[str, Any],
+                              stream: bool = False,
+                              deadline: Optional[float] = None):
+        """POST /chat/completions; pass stream=True for a server-sent event stream"""
+        return await self.post("/chat/completions", api_key, payload, stream=stream, deadline=deadline)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "retries": self.retries}
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_async_client: Optional[AsyncUpstreamClient] = None
+
+
+def get_async_client() -> AsyncUpstreamClient:
+    """The process-wide async upstream client (ASGI mode), configured like get_client()"""
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncUpstreamClient(
+                pool_size=int(os.getenv("ASHA_ASYNC_POOL_SIZE", "200")),
+                read_timeout=float(os.getenv("ASHA_UPSTREAM_TIMEOUT", "30")),
+                max_retries=int(os.getenv("ASHA_UPSTREAM_RETRIES", "2")),
+                breaker=get_upstream_breaker()
+            )
+        return _async_client
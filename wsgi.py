@@ -8,11 +8,23 @@ import sys
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from src.startup import PROFILE, rag_warmup
+
 # Import the Flask app
-from app.app import app
+with PROFILE.phase("import app"):
+    from app.app import app
 
 # This is what Gunicorn will look for
 application = app
 
 if __name__ == '__main__':
+    if '--profile-startup' in sys.argv:
+        # Wait for the background warm-up, print the import/init breakdown and exit
+        warmup = rag_warmup().start()
+        try:
+            warmup.get()
+        except Exception as e:
+            print(f"RAG warm-up failed: {e}")
+        print(PROFILE.report())
+        sys.exit(0)
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000))) 
\ No newline at end of file